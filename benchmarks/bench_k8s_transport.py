@@ -0,0 +1,68 @@
+"""
+Per-operation latency of the K8S backend transports
+
+Times the read-only calls K8sCommands makes against the cluster of the
+current kubeconfig context, once by running kubectl/helm and once through
+the pooled API client used by --transport API.
+
+    python benchmarks/bench_k8s_transport.py NAMESPACE [REPEATS]
+"""
+
+import subprocess
+import sys
+import time
+from collections.abc import Callable
+
+from edge_containers_cli.cmds.k8s_api import K8sApiClient
+from edge_containers_cli.cmds.k8s_services import STS_JSONPATH
+from edge_containers_cli.tracing import percentile
+
+
+def run(command: str) -> None:
+    subprocess.run(command, shell=True, check=True, capture_output=True)
+
+
+def measure(call: Callable[[], object], repeats: int) -> list[float]:
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        call()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def main():
+    namespace = sys.argv[1]
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    api = K8sApiClient.from_kubeconfig()
+
+    operations = {
+        "get namespace": (
+            lambda: run(f"kubectl get namespace {namespace}"),
+            lambda: api.get_namespace(namespace),
+        ),
+        "list statefulsets": (
+            lambda: run(
+                f'kubectl get statefulset -l "is_ioc==true" -n {namespace} '
+                f"-o jsonpath='{STS_JSONPATH}'"
+            ),
+            lambda: api.list_statefulsets(namespace, "is_ioc==true"),
+        ),
+        "list helm releases": (
+            lambda: run(f"helm list -n {namespace} -o json"),
+            lambda: api.list_helm_releases(namespace),
+        ),
+    }
+
+    print(f"{'operation':<20} {'transport':<9} {'p50 (ms)':>9} {'p95 (ms)':>9}")
+    for name, (cli_call, api_call) in operations.items():
+        for transport, call in (("CLI", cli_call), ("API", api_call)):
+            times = measure(call, repeats)
+            print(
+                f"{name:<20} {transport:<9} {percentile(times, 0.5) * 1e3:9.1f}"
+                f" {percentile(times, 0.95) * 1e3:9.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
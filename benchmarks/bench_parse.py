@@ -0,0 +1,89 @@
+"""
+Parsing cost of a kubectl statefulset listing as YAML versus JSON
+
+Builds a synthetic `kubectl get statefulset -o yaml|json` payload of full
+StatefulSet objects, pod templates included, and times parsing it with
+ruamel.yaml (as the backends used to) and with the stdlib json module.
+
+    python benchmarks/bench_parse.py [NUMBER_OF_STATEFULSETS]
+"""
+
+import io
+import json
+import sys
+import timeit
+
+from ruamel.yaml import YAML
+
+
+def statefulset(index: int) -> dict:
+    name = f"bl01t-ea-test-{index:04d}"
+    return {
+        "apiVersion": "apps/v1",
+        "kind": "StatefulSet",
+        "metadata": {
+            "name": name,
+            "namespace": "bl01t",
+            "creationTimestamp": "2024-07-26T08:16:07Z",
+            "labels": {"app": name, "is_ioc": "true", "description": "a-device"},
+            "resourceVersion": str(1000 + index),
+        },
+        "spec": {
+            "replicas": 1,
+            "selector": {"matchLabels": {"app": name}},
+            "template": {
+                "metadata": {"labels": {"app": name, "is_ioc": "true"}},
+                "spec": {
+                    "containers": [
+                        {
+                            "name": name,
+                            "image": "ghcr.io/epics-containers/ioc-generic:2024.7.1",
+                            "env": [
+                                {"name": f"VAR_{var}", "value": f"value-{var}"}
+                                for var in range(10)
+                            ],
+                            "volumeMounts": [
+                                {"name": f"vol-{vol}", "mountPath": f"/mnt/{vol}"}
+                                for vol in range(4)
+                            ],
+                            "resources": {
+                                "limits": {"cpu": "1", "memory": "1Gi"},
+                                "requests": {"cpu": "100m", "memory": "128Mi"},
+                            },
+                        }
+                    ],
+                    "volumes": [
+                        {"name": f"vol-{vol}", "configMap": {"name": f"{name}-{vol}"}}
+                        for vol in range(4)
+                    ],
+                },
+            },
+        },
+        "status": {"readyReplicas": 1, "replicas": 1, "currentRevision": "abc"},
+    }
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    listing = {
+        "apiVersion": "v1",
+        "kind": "List",
+        "items": [statefulset(index) for index in range(count)],
+    }
+    as_json = json.dumps(listing, indent=4)
+    stream = io.StringIO()
+    YAML(typ="safe", pure=True).dump(listing, stream)
+    as_yaml = stream.getvalue()
+
+    repeats = 3
+    yaml_time = timeit.timeit(lambda: YAML(typ="safe").load(as_yaml), number=repeats)
+    json_time = timeit.timeit(lambda: json.loads(as_json), number=repeats)
+
+    print(f"{count} statefulsets: {len(as_yaml) / 1e6:.1f} MB yaml")
+    print(f"ruamel.yaml safe load {yaml_time / repeats * 1e3:10.1f} ms")
+    print(f"json.loads            {json_time / repeats * 1e3:10.1f} ms")
+    print(f"speedup               {yaml_time / json_time:10.1f} x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""
+Per-call overhead of running a coroutine from synchronous code
+
+Compares the shared background event loop used by utils._run_async with
+the previous approach of a fresh event loop per call.
+
+    python benchmarks/bench_run_async.py
+"""
+
+import asyncio
+import timeit
+
+from edge_containers_cli.utils import _run_async, _run_on_new_loop
+
+CALLS = 1000
+
+
+async def noop():
+    await asyncio.sleep(0)
+
+
+async def subprocess():
+    process = await asyncio.create_subprocess_exec(
+        "true", stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+    )
+    await process.communicate()
+
+
+def report(name: str, seconds: float, calls: int):
+    print(f"{name:<32} {seconds / calls * 1e6:10.1f} us/call")
+
+
+def main():
+    _run_async(noop())  # start the shared loop outside the timing
+
+    for coroutine, calls in ((noop, CALLS), (subprocess, CALLS // 10)):
+        shared = timeit.timeit(lambda c=coroutine: _run_async(c()), number=calls)
+        fresh = timeit.timeit(lambda c=coroutine: _run_on_new_loop(c()), number=calls)
+        report(f"{coroutine.__name__}: shared loop", shared, calls)
+        report(f"{coroutine.__name__}: new loop per call", fresh, calls)
+
+
+if __name__ == "__main__":
+    main()
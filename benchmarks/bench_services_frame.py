@@ -0,0 +1,67 @@
+"""
+Cost of building the services table from statefulset objects
+
+Compares the per-row loop the K8S backend used, with strptime/strftime and
+list appends for every statefulset, against loading the objects into polars
+once and deriving the columns with expressions.
+
+    python benchmarks/bench_services_frame.py [NUMBER_OF_STATEFULSETS]
+"""
+
+import sys
+import timeit
+from datetime import datetime
+
+import polars
+from bench_parse import statefulset
+
+from edge_containers_cli.cmds.k8s_services import services_frame, sts_frame
+from edge_containers_cli.globals import TIME_FORMAT
+
+
+def per_row(items: list[dict]) -> polars.DataFrame:
+    service_data: dict[str, list] = {
+        "name": [],
+        "label": [],
+        "ready": [],
+        "deployed": [],
+    }
+    for sts in items:
+        try:
+            label = sts["metadata"]["labels"]["description"]
+        except KeyError:
+            label = "service"
+        time_stamp = datetime.strptime(
+            sts["metadata"]["creationTimestamp"], "%Y-%m-%dT%H:%M:%SZ"
+        )
+        try:
+            is_ready = bool(sts["status"]["readyReplicas"])
+        except KeyError:
+            is_ready = False
+        service_data["name"].append(sts["metadata"]["name"])
+        service_data["label"].append(label)
+        service_data["ready"].append(is_ready)
+        service_data["deployed"].append(datetime.strftime(time_stamp, TIME_FORMAT))
+    return polars.from_dict(service_data)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    items = [statefulset(index) for index in range(count)]
+    versions = polars.DataFrame(
+        schema=polars.Schema({"name": polars.String, "version": polars.String})
+    )
+
+    repeats = 5
+    loop_time = timeit.timeit(lambda: per_row(items), number=repeats)
+    vector_time = timeit.timeit(
+        lambda: services_frame(sts_frame(items), versions), number=repeats
+    )
+
+    print(f"{count} statefulsets")
+    print(f"per-row loop      {loop_time / repeats * 1e3:10.1f} ms")
+    print(f"polars structs    {vector_time / repeats * 1e3:10.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,24 @@
 import os
 import sys
+from functools import partial
+from pathlib import Path
 
 import typer
 
 from edge_containers_cli.cli import cli, drop_methods, drop_options, set_optional
-from edge_containers_cli.definitions import ENV, ECBackends, ECContext, ECLogLevels
+from edge_containers_cli.definitions import (
+    ENV,
+    ECBackends,
+    ECContext,
+    ECLogLevels,
+    ECTransports,
+)
 
 from . import __version__
 from .backend import backend as ec_backend
 from .backend import init_backend
 from .logging import init_logging
-from .shell import init_shell
+from .shell import init_cassette, init_shell, init_tracer
 from .utils import init_cleanup
 
 __all__ = ["main"]
@@ -99,16 +107,65 @@ def _main(
         help="Log url",
         envvar=ENV.log_url.value,
     ),
+    timeout: float | None = typer.Option(
+        None,
+        help="Seconds before a backend command is killed",
+        envvar=ENV.timeout.value,
+        show_default=False,
+    ),
+    trace: str | None = typer.Option(
+        None,
+        metavar="FILE",
+        help="Record every command run: FILE.json for a Chrome/Perfetto trace, "
+        "'-' for a latency summary on stderr",
+        envvar=ENV.trace.value,
+        show_default=False,
+    ),
+    record: Path | None = typer.Option(
+        None,
+        metavar="FILE",
+        help="Record every command and its response to a cassette file",
+        envvar=ENV.record.value,
+        dir_okay=False,
+        show_default=False,
+    ),
+    replay: Path | None = typer.Option(
+        None,
+        metavar="FILE",
+        help="Serve commands from a recorded cassette instead of running them",
+        envvar=ENV.replay.value,
+        exists=True,
+        dir_okay=False,
+        show_default=False,
+    ),
+    replay_latency: float = typer.Option(
+        0.0,
+        help="Fraction of the recorded latency to simulate when replaying",
+        envvar=ENV.replay_latency.value,
+    ),
+    transport: ECTransports = typer.Option(
+        ECContext().transport,
+        help="How the backend reaches the cluster: its command line tools or the API",
+        envvar=ENV.transport.value,
+    ),
 ):
     """Edge Containers assistant CLI"""
     init_logging(ECLogLevels.DEBUG if debug else log_level)
-    init_shell(verbose, dryrun)
+    init_shell(verbose, dryrun, timeout)
+    if trace:
+        tracer = init_tracer()
+        ctx.call_on_close(partial(tracer.dump, trace))
+    if record and replay:
+        raise typer.BadParameter("--record and --replay are mutually exclusive")
+    if cassette := init_cassette(record, replay, replay_latency):
+        ctx.call_on_close(cassette.save)
     init_cleanup(debug)
 
     context = ECContext(
         repo=repo,
         target=target,
         log_url=log_url,
+        transport=transport,
     )
     ec_backend.set_context(context)
 
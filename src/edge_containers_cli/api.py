@@ -0,0 +1,126 @@
+"""
+Shared plumbing for clients that call a server's HTTP API directly rather
+than running its command line tool
+
+Requests share a pooled session so that each call pays neither process
+start, configuration parsing nor a TLS handshake. They are echoed and traced
+as the shell does for commands.
+"""
+
+import threading
+import time
+from typing import Any
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from . import globals
+from .shell import ShellError, ShellTimeoutError, shell
+from .tracing import CommandRecord, find_caller
+
+
+class ApiError(ShellError):
+    """
+    An error from an API server, worded as its command line tool reports it
+    so that callers handle both transports alike
+    """
+
+
+class ApiClient:
+    """
+    Requests to one server over a session that is safe to share between
+    threads
+    """
+
+    error: type[ApiError] = ApiError
+
+    def __init__(self, server: str, pool_size: int = globals.API_POOL_SIZE):
+        self.server = server.rstrip("/")
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self._auth_lock = threading.Lock()
+
+    def _refresh_credentials(self) -> bool:
+        """
+        Renew credentials the server rejected, returning True to retry
+        """
+        return False
+
+    def _error_message(self, response: requests.Response) -> str:
+        return f"Error from server ({response.status_code}): {response.text}"
+
+    def request(
+        self,
+        method: str,
+        path: str,
+        params: dict[str, Any] | None = None,
+        skip_on_dryrun: bool = False,
+        **kwargs,
+    ) -> requests.Response | None:
+        """
+        Make a request, echoed and traced as the shell does for commands
+
+        args:
+            method: the HTTP method
+            path: the API path, e.g. /api/v1/namespaces
+            params: query parameters
+            skip_on_dryrun: do not make the request during a dry run,
+                returning None
+        """
+        command = f"{method} {path}"
+        if params:
+            command += "?" + "&".join(f"{key}={value}" for key, value in params.items())
+        if shell.dry_run:
+            shell.echo_command(f"(skipped) {command}" if skip_on_dryrun else command)
+            if skip_on_dryrun:
+                return None
+        elif shell.verbose:
+            shell.echo_command(command)
+
+        start = time.time()
+        response = None
+        try:
+            response = self._send(method, path, params, **kwargs)
+            if response.status_code == 401:
+                with self._auth_lock:
+                    retry = self._refresh_credentials()
+                if retry:
+                    response = self._send(method, path, params, **kwargs)
+        except requests.Timeout as e:
+            raise ShellTimeoutError(
+                f"Request timed out after {shell.timeout}s: {command}"
+            ) from e
+        except requests.RequestException as e:
+            raise self.error(f"Unable to connect to the server: {e}") from e
+        finally:
+            if shell.tracer is not None:
+                shell.tracer.add(
+                    CommandRecord(
+                        command=command,
+                        caller=find_caller(),
+                        start=start,
+                        duration=time.time() - start,
+                        returncode=response.status_code
+                        if response is not None
+                        else None,
+                        output_bytes=len(response.content)
+                        if response is not None and not kwargs.get("stream")
+                        else 0,
+                        thread=threading.get_ident(),
+                    )
+                )
+
+        if not response.ok:
+            raise self.error(self._error_message(response))
+        return response
+
+    def _send(self, method, path, params, **kwargs) -> requests.Response:
+        kwargs.setdefault("timeout", shell.timeout)
+        return self.session.request(
+            method,
+            self.server + path,
+            params=params,
+            **kwargs,
+        )
@@ -0,0 +1,107 @@
+"""
+Record the commands run by the shell and replay them without a cluster
+
+A cassette is a YAML list of interactions using the same cmd/rsp keys as the
+test data in tests/data, so a recording can also seed the MockRun fixture.
+"""
+
+import re
+import tempfile
+import threading
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+from ruamel.yaml import YAML
+from ruamel.yaml.scalarstring import LiteralScalarString
+
+# Working directories differ between runs so are masked when matching
+_TMP_PATH = re.compile(rf"{re.escape(tempfile.gettempdir())}/\S*")
+
+
+def _match_key(command: str) -> str:
+    return _TMP_PATH.sub("{tmp}", command.strip())
+
+
+def _is_block_text(text: str | bool) -> bool:
+    """
+    Multi-line text is stored as a literal block unless it holds characters
+    that only a quoted scalar can represent
+    """
+    return (
+        isinstance(text, str)
+        and "\n" in text
+        and all(char.isprintable() or char in "\n\t" for char in text)
+    )
+
+
+@dataclass
+class Interaction:
+    cmd: str
+    rsp: str | bool  # str from run_command, bool from run_interactive
+    err: str
+    rc: int
+    duration: float  # seconds
+
+
+class Cassette:
+    """
+    Holds the interactions recorded to, or replayed from, a cassette file
+    """
+
+    def __init__(self, path: Path, replay: bool = False, latency: float = 0.0):
+        """
+        args:
+            path: the cassette file
+            replay: serve responses from the file instead of recording to it
+            latency: fraction of the recorded duration to wait when replaying
+        """
+        self.path = path
+        self.replay = replay
+        self.latency = latency
+        self.interactions: list[Interaction] = []
+        self._lock = threading.Lock()
+        self._played: dict[str, list[Interaction]] = {}
+
+        if replay:
+            for entry in YAML(typ="safe").load(path) or []:
+                interaction = Interaction(
+                    cmd=entry["cmd"],
+                    rsp=entry["rsp"],
+                    err=entry.get("err", ""),
+                    rc=entry.get("rc", 0),
+                    duration=entry.get("duration", 0.0),
+                )
+                self.interactions.append(interaction)
+                self._played.setdefault(_match_key(interaction.cmd), []).append(
+                    interaction
+                )
+
+    def record(self, interaction: Interaction) -> None:
+        with self._lock:
+            self.interactions.append(interaction)
+
+    def play(self, command: str) -> Interaction | None:
+        """
+        Return the next recorded interaction for a command. Once exhausted the
+        last response is repeated so that polling settles on the final state.
+        """
+        with self._lock:
+            queue = self._played.get(_match_key(command))
+            if not queue:
+                return None
+            return queue.pop(0) if len(queue) > 1 else queue[0]
+
+    def save(self) -> None:
+        if self.replay:
+            return
+        entries = []
+        for interaction in self.interactions:
+            entry = asdict(interaction)
+            for key in ("rsp", "err"):
+                if _is_block_text(entry[key]):
+                    entry[key] = LiteralScalarString(entry[key])
+            entries.append(entry)
+        yaml = YAML()
+        yaml.width = 4096
+        with open(self.path, "w") as f:
+            yaml.dump(entries, f)
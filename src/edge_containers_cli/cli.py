@@ -18,7 +18,7 @@ from edge_containers_cli.cmds.commands import CommandError
 from edge_containers_cli.definitions import ENV
 from edge_containers_cli.git import GitError, list_all, list_instances
 from edge_containers_cli.logging import log
-from edge_containers_cli.shell import ShellError
+from edge_containers_cli.shell import ShellError, shell
 from edge_containers_cli.utils import async_command
 
 
@@ -110,6 +110,9 @@ async def deploy(
         callback=_check_description,
     ),
     wait: bool = typer.Option(False, "--wait", help="Waits for readiness"),
+    wait_timeout: int = typer.Option(
+        globals.WAIT_TIMEOUT, help="Seconds to wait for readiness"
+    ),
     yes: bool = typer.Option(False, "-y", "--yes", help="Skip confirmation prompt"),
     args: str = typer.Option(
         "", help="Additional args for helm or docker, 'must be quoted'"
@@ -131,10 +134,14 @@ async def deploy(
             yes,
         )
 
-    args = args if not wait else args + " --wait"
     version = version if version != "latest tag" else ""
     await backend.commands.deploy(
-        service_name, version, description, args, confirm_callback
+        service_name,
+        version,
+        description,
+        args,
+        confirm_callback,
+        wait_timeout=wait_timeout if wait else None,
     )
 
 
@@ -267,6 +274,10 @@ def monitor(
         MonitorApp,  # Lazy import for performace
     )
 
+    # A hung backend must not stall every subsequent poll
+    if shell.timeout is None:
+        shell.timeout = globals.MONITOR_TIMEOUT
+
     app = MonitorApp(backend.commands, running_only)
     app.run()
 
@@ -276,41 +287,65 @@ def ps(
     running_only: bool = typer.Option(
         False, "-r", "--running-only", help="list only services that are running"
     ),
+    targets: list[str] = typer.Option(
+        [],
+        "-T",
+        "--targets",
+        help="List these targets instead of the current one, repeat the option, "
+        "use glob patterns or @FILE with one per line",
+        show_default=False,
+    ),
 ):
     """List the services running in the current target"""
-    backend.commands.ps(running_only)
+    backend.commands.ps(running_only, targets)
 
 
 @cli.command()
 @async_command
 async def restart(
-    service_name: str = typer.Argument(
+    service_names: list[str] = typer.Argument(
         ...,
-        help="Name of the container to restart",
+        help="Names of the containers to restart",
         autocompletion=running_svc,
         show_default=False,
     ),
 ):
-    """Restart a service"""
-    await backend.commands.restart(service_name)
+    """Restart one or more services"""
+    await backend.commands.restart(service_names)
 
 
 @cli.command()
 @async_command
 async def start(
-    service_name: str = typer.Argument(
-        ...,
-        help="Name of the service container to start",
+    service_names: list[str] = typer.Argument(
+        None,
+        help="Names of the service containers to start",
         autocompletion=all_svc,
         show_default=False,
     ),
+    selector: str = typer.Option(
+        None,
+        "--selector",
+        "-s",
+        help="Also start the services whose names match this glob pattern",
+        show_default=False,
+    ),
     commit: bool = typer.Option(
         False, help="Also commit the change to the git repo for an audit trail"
     ),
+    wait: bool = typer.Option(False, "--wait", help="Waits for the services to settle"),
+    wait_timeout: int = typer.Option(
+        globals.WAIT_TIMEOUT, help="Seconds to wait for the services to settle"
+    ),
 ):
-    """Start a service"""
+    """Start one or more services"""
     try:
-        await backend.commands.start(service_name, commit=commit)
+        await backend.commands.start(
+            service_names,
+            commit=commit,
+            selector=selector,
+            wait_timeout=wait_timeout if wait else None,
+        )
     except GitError as e:
         msg = f"{str(e)} - Commit failed. Try 'ec start <service> --no-commit to set values without updating git"
         raise GitError(msg) from e
@@ -319,19 +354,35 @@ async def start(
 @cli.command()
 @async_command
 async def stop(
-    service_name: str = typer.Argument(
-        ...,
-        help="Name of the service container to stop",
+    service_names: list[str] = typer.Argument(
+        None,
+        help="Names of the service containers to stop",
         autocompletion=running_svc,
         show_default=False,
     ),
+    selector: str = typer.Option(
+        None,
+        "--selector",
+        "-s",
+        help="Also stop the services whose names match this glob pattern",
+        show_default=False,
+    ),
     commit: bool = typer.Option(
         False, help="Also commit the change to the git repo for an audit trail"
     ),
+    wait: bool = typer.Option(False, "--wait", help="Waits for the services to settle"),
+    wait_timeout: int = typer.Option(
+        globals.WAIT_TIMEOUT, help="Seconds to wait for the services to settle"
+    ),
 ):
-    """Stop a service"""
+    """Stop one or more services"""
     try:
-        await backend.commands.stop(service_name, commit=commit)
+        await backend.commands.stop(
+            service_names,
+            commit=commit,
+            selector=selector,
+            wait_timeout=wait_timeout if wait else None,
+        )
     except GitError as e:
         msg = f"{str(e)} - Commit failed. Try ec stop <service> --no-commit to set values without updating git"
         raise GitError(msg) from e
@@ -371,9 +422,11 @@ def drop_options(ctx: typer.Context, to_drop: dict[str, list[str]]):
     """Dynamically drop any cli options as specified"""
     typer_commands = ctx.command.commands  # type: ignore
     for cmd_name, drop_params in to_drop.items():
-        for i, param in enumerate(typer_commands[cmd_name].params):
-            if param.name in drop_params:
-                typer_commands[cmd_name].params.pop(i)
+        typer_commands[cmd_name].params = [
+            param
+            for param in typer_commands[cmd_name].params
+            if param.name not in drop_params
+        ]
 
 
 def set_optional(ctx: typer.Context, to_set: dict[str, list[str]]):
@@ -5,29 +5,94 @@ Relies on the Helm class for deployment aspects.
 """
 
 import asyncio
+import functools
+import json
 import os
 import re
+import sys
+import time
 import webbrowser
-from datetime import datetime
+from collections.abc import AsyncIterable
+from contextlib import aclosing
 from pathlib import Path
-from time import sleep
+from typing import Any, Self
 
 import polars
 import typer
 from ruamel.yaml import YAML
 
 from edge_containers_cli import globals
+from edge_containers_cli.cmds.argocd_api import ArgoApiClient
 from edge_containers_cli.cmds.commands import (
     CommandError,
     Commands,
     ServicesDataFrame,
-    ServicesSchema,
+    derive_services,
 )
-from edge_containers_cli.definitions import ENV, ECContext
-from edge_containers_cli.git import check_exists, del_key, set_value
-from edge_containers_cli.logging import log
+from edge_containers_cli.definitions import ENV, ECContext, ECTransports
+from edge_containers_cli.git import check_exists, del_key, set_values
 from edge_containers_cli.shell import ShellError, shell
-from edge_containers_cli.utils import YamlTypes, _AsyncFuncType, _run_async
+from edge_containers_cli.utils import (
+    RetryPolicy,
+    YamlTypes,
+    _AsyncFuncType,
+    _run_async,
+)
+
+# The fields of each service as found in the argocd app and its manifests
+RAW_SERVICES_SCHEMA = polars.Schema(
+    {
+        "name": polars.String,
+        "label": polars.String,
+        "version": polars.String,
+        "ready": polars.Int64,
+        "deployed": polars.String,
+    }
+)
+
+
+# The kinds of resource that run a service
+WORKLOAD_KINDS = ("StatefulSet", "Deployment")
+
+# The kind of a YAML document, when given at the top level in block style
+_DOCUMENT_KIND = re.compile(r"kind:\s*[\"']?(\w+)")
+
+# Marks a memo entry that has not been fetched yet
+_MISSING = object()
+
+
+def _parse_workload(document: list[str], name: str) -> dict | None:
+    kinds = [match[1] for line in document if (match := _DOCUMENT_KIND.match(line))]
+    if kinds and kinds[0] not in WORKLOAD_KINDS:
+        return None
+    manifest = YAML(typ="safe").load("".join(document))
+    if (
+        isinstance(manifest, dict)
+        and manifest.get("kind") in WORKLOAD_KINDS
+        and (manifest.get("metadata") or {}).get("name") == name
+    ):
+        return manifest
+    return None
+
+
+async def find_workload(lines: AsyncIterable[str], name: str) -> dict | None:
+    """
+    The first StatefulSet or Deployment called name in a stream of YAML
+    documents
+
+    Documents are only parsed when their kind is a workload, so large
+    ConfigMaps and the like are passed over, and the scan stops reading at
+    the first match.
+    """
+    document: list[str] = []
+    async for line in lines:
+        if line.startswith("---"):
+            if document and (manifest := _parse_workload(document, name)):
+                return manifest
+            document = []
+        else:
+            document.append(line)
+    return _parse_workload(document, name) if document else None
 
 
 def extract_ns_app(target: str) -> tuple[str, str]:
@@ -35,11 +100,45 @@ def extract_ns_app(target: str) -> tuple[str, str]:
     return namespace, app
 
 
-async def get_patches(target) -> dict:
+async def get_app(target: str, api: ArgoApiClient | None = None) -> dict:
+    if api is not None:
+        app = await asyncio.to_thread(api.get_app, target)
+        assert app is not None
+        return app
     app_resp = await shell.run_command(
-        f"argocd app get --show-params {target} -o json",
+        f"argocd app get {target} -o json",
     )
-    app_dicts = YAML(typ="safe").load(app_resp)
+    return json.loads(app_resp)
+
+
+async def refresh_app(target: str, api: ArgoApiClient | None = None) -> None:
+    if api is not None:
+        await asyncio.to_thread(api.get_app, target, refresh=True)
+        return
+    cmd_refresh = f"argocd app get {target} --refresh"
+    await shell.run_command(cmd_refresh, skip_on_dryrun=True)
+
+
+async def get_patches(target, api: ArgoApiClient | None = None) -> dict:
+    if api is not None:
+        app_dicts = await get_app(target, api)
+    else:
+        app_resp = await shell.run_command(
+            f"argocd app get --show-params {target} -o json",
+        )
+        app_dicts = json.loads(app_resp)
+    return _app_patches(app_dicts)
+
+
+def app_source(app_dicts: dict) -> tuple[str, Path]:
+    """
+    The repo URL and the path within it of an app's source
+    """
+    source = app_dicts["spec"]["source"]
+    return source["repoURL"], Path(source["path"])
+
+
+def _app_patches(app_dicts: dict) -> dict:
     try:
         patch_dict = app_dicts["spec"]["source"]["helm"]["parameters"]
     except KeyError:
@@ -47,82 +146,150 @@ async def get_patches(target) -> dict:
     return patch_dict
 
 
-def do_retry(cmd: _AsyncFuncType):
-    async def _do_retry(*args, **kwargs):
-        max_attempts = 5
-        attempt = 1
-        sleep_time = 1
-        while attempt <= max_attempts:
-            try:
-                await cmd(*args, **kwargs)
-                return None
-            except ShellError:
-                if attempt == max_attempts:
-                    log.debug(f"Retry failed after {max_attempts} attempts")
-                    raise
-                else:
-                    log.debug(f"Retry attempt {attempt} failed. Retrying...")
-                    sleep(sleep_time)
-                    attempt += 1
+def _is_transient(error: Exception) -> bool:
+    """
+    Whether an argocd error may pass on retrying, rather than one reporting a
+    request that will fail again
+    """
+    permanent = ("PermissionDenied", "NotFound", "InvalidArgument", "Unauthenticated")
+    return not any(f"code = {code}" in str(error) for code in permanent)
 
-    return _do_retry
+
+ARGO_RETRY = RetryPolicy(retry_on=(ShellError,), transient=_is_transient)
+
+
+def do_retry(cmd: _AsyncFuncType | None = None, *, policy: RetryPolicy = ARGO_RETRY):
+    """
+    Retry cmd on transient errors by policy, which callers may override with
+    a retry keyword argument
+    """
+
+    def decorate(cmd: _AsyncFuncType) -> _AsyncFuncType:
+        @functools.wraps(cmd)
+        async def _do_retry(*args, retry: RetryPolicy | None = None, **kwargs):
+            return await (retry or policy).run(cmd, *args, **kwargs)
+
+        return _do_retry
+
+    return decorate(cmd) if cmd is not None else decorate
 
 
 @do_retry
-async def patch_value(target: str, key: str, value: YamlTypes):
-    cmd_temp_ = f"argocd app set {target} -p {key}={value}"
+async def patch_values(
+    target: str, values: dict[str, YamlTypes], api: ArgoApiClient | None = None
+):
+    """
+    Override several values of the target app with one argocd call
+    """
+    if api is not None:
+        parameters = {key: str(value) for key, value in values.items()}
+        await asyncio.to_thread(api.set_parameters, target, parameters)
+        return
+    params = " ".join(f"-p {key}={value}" for key, value in values.items())
+    cmd_temp_ = f"argocd app set {target} {params}"
     await shell.run_command(cmd_temp_, skip_on_dryrun=True)
     # Rely on argocd autosync to get the cluster into the right state
 
 
-async def _unset_key_and_children(target: str, key: str):
-    cmd_unset = f"argocd app unset {target} -p {key}"
-    await shell.run_command(cmd_unset, skip_on_dryrun=True)
-    app_patches = await get_patches(target)
-    for patch in app_patches:
-        if re.match(rf"{key}\..*", patch["name"]):
-            cmd_unset_child = f"argocd app unset {target} -p {patch['name']}"
-            await shell.run_command(cmd_unset_child, skip_on_dryrun=True)
+async def _unset_key_and_children(
+    target: str,
+    keys: list[str],
+    api: ArgoApiClient | None = None,
+    app_dicts: dict | None = None,
+):
+    """
+    Remove the patched values of keys and their children in one call, finding
+    them in app_dicts when the caller has already fetched the app
+    """
+    if api is not None:
+        await asyncio.to_thread(api.unset_parameters, target, keys)
+        return
+    if app_dicts is None:
+        app_patches = await get_patches(target)
+    else:
+        app_patches = _app_patches(app_dicts)
+    names = [
+        patch["name"]
+        for patch in app_patches
+        if any(
+            patch["name"] == key or patch["name"].startswith(f"{key}.") for key in keys
+        )
+    ]
+    if names:
+        params = " ".join(f"-p {name}" for name in names)
+        cmd_unset = f"argocd app unset {target} {params}"
+        await shell.run_command(cmd_unset, skip_on_dryrun=True)
+
+
+async def push_value(
+    target: str,
+    key: str,
+    value: YamlTypes,
+    api: ArgoApiClient | None = None,
+    app_dicts: dict | None = None,
+):
+    await push_values(target, {key: value}, api, app_dicts)
 
 
 @do_retry
-async def push_value(target: str, key: str, value: YamlTypes):
-    # Get source details
-    app_resp = await shell.run_command(
-        f"argocd app get {target} -o yaml",
-    )
-    app_dicts = YAML(typ="safe").load(app_resp)
-    repo_url = app_dicts["spec"]["source"]["repoURL"]
-    path = Path(app_dicts["spec"]["source"]["path"])
+async def push_values(
+    target: str,
+    values: dict[str, YamlTypes],
+    api: ArgoApiClient | None = None,
+    app_dicts: dict | None = None,
+):
+    """
+    Commit several values to the target app's repo in one commit, reading the
+    source from app_dicts when the caller has already fetched the app
+    """
+    if app_dicts is None:
+        app_dicts = await get_app(target, api)
+    repo_url, path = app_source(app_dicts)
 
-    await set_value(repo_url, path / "values.yaml", key, value)
+    await set_values(repo_url, path / "values.yaml", values)
 
-    # Free a possible patched value, its children & refresh repo
-    await _unset_key_and_children(target, key)
-    cmd_refresh = f"argocd app get {target} --refresh"
-    await shell.run_command(cmd_refresh, skip_on_dryrun=True)
+    # Free possible patched values, their children & refresh repo
+    await _unset_key_and_children(target, list(values), api, app_dicts)
+    await refresh_app(target, api)
     # Rely on argocd autosync to get the cluster into the right state
 
 
 @do_retry
-async def push_remove_key(target: str, key: str):
-    # Get source details
-    app_resp = await shell.run_command(
-        f"argocd app get {target} -o yaml",
-    )
-    app_dicts = YAML(typ="safe").load(app_resp)
-    repo_url = app_dicts["spec"]["source"]["repoURL"]
-    path = Path(app_dicts["spec"]["source"]["path"])
+async def push_remove_key(
+    target: str,
+    key: str,
+    api: ArgoApiClient | None = None,
+    app_dicts: dict | None = None,
+):
+    if app_dicts is None:
+        app_dicts = await get_app(target, api)
+    repo_url, path = app_source(app_dicts)
 
     await del_key(repo_url, path / "values.yaml", key)
 
     # Free a possible patched value, its children & refresh repo
-    await _unset_key_and_children(target, key)
-    cmd_refresh = f"argocd app get {target} --refresh"
-    await shell.run_command(cmd_refresh, skip_on_dryrun=True)
+    await _unset_key_and_children(target, [key], api, app_dicts)
+    await refresh_app(target, api)
     # Rely on argocd autosync to get the cluster into the right state
 
 
+async def wait_app(
+    target: str, timeout: float, health: bool, api: ArgoApiClient | None = None
+):
+    """
+    Wait for an app to sync, and to be healthy if health, as argocd reports
+    the change rather than by polling it. The app is refreshed first, as its
+    status can still describe the spec from before the change.
+    """
+    if api is not None:
+        await asyncio.to_thread(api.wait_app, target, timeout, health)
+        return
+    await refresh_app(target)
+    checks = "--sync --health" if health else "--sync"
+    cmd_wait = f"argocd app wait {target} {checks} --timeout {max(int(timeout), 1)}"
+    await shell.run_command(cmd_wait, skip_on_dryrun=True)
+
+
 def get_services_repo(deployment_repo_url: str) -> str:
     services_repo_url = ""
     return services_repo_url
@@ -134,7 +301,7 @@ class ArgoCommands(Commands):
     """
 
     params_opt_out = {
-        "deploy": ["args", "wait"],
+        "deploy": ["args"],
     }
 
     def __init__(
@@ -145,14 +312,69 @@ class ArgoCommands(Commands):
 
         self.app_dicts = {}
         self.services_df = polars.DataFrame()
-        self.async_lock = asyncio.Lock()
+        self._transport = ctx.transport
+        self._api: ArgoApiClient | None = None
+        # Replies from argocd kept for the duration of one command
+        self._memo: dict[tuple[str, ...], Any] = {}
+        # The ps fields of each app, kept across polls with the app version
+        # they were read from
+        self._summaries: dict[str, tuple[str, list[dict]]] = {}
+
+    @property
+    def api(self) -> ArgoApiClient | None:
+        """
+        The API client when the API transport is selected, else None
+        """
+        if self._transport is ECTransports.API and self._api is None:
+            self._api = ArgoApiClient.from_config()
+        return self._api
+
+    def _with_target(self, target: str) -> Self:
+        # Targets share one client and its pooled connections
+        commands = super()._with_target(target)
+        commands._api = self.api  # noqa: SLF001
+        return commands
+
+    def _begin_command(self) -> None:
+        # Keep the root app fetched validating the target, which may happen
+        # just before the command starts
+        self._memo = {key: self._memo[key] for key in self._memo if key == ("root",)}
+
+    async def _root_app(self) -> dict:
+        """
+        The target app, fetched once per command and shared with validation
+        """
+        # Validating the target may fetch it first
+        target = self.target
+        return await self._memoised(("root",), lambda: get_app(target, self.api))
+
+    async def _memoised(self, key: tuple[str, ...], fetch: _AsyncFuncType) -> Any:
+        """
+        The result of fetch, reused until the command ends or changes the apps
+        """
+        # The monitor clears the memo from other threads, so look the key up
+        # once and return the fetched value rather than reading it back
+        value = self._memo.get(key, _MISSING)
+        if value is _MISSING:
+            value = await fetch()
+            self._memo[key] = value
+        return value
 
     async def delete(self, service_name: str) -> None:
         await self._check_service(service_name)
-        await push_remove_key(self.target, f"services.{service_name}")
+        await push_remove_key(
+            self.target, f"services.{service_name}", self.api, await self._root_app()
+        )
+        self._memo.clear()
 
     async def deploy(
-        self, service_name, version, description, args, confirm_callback=None
+        self,
+        service_name,
+        version,
+        description,
+        args,
+        confirm_callback=None,
+        wait_timeout=None,
     ) -> None:
         if not version:
             latest_version = await self._get_latest_version(service_name)
@@ -180,7 +402,16 @@ class ArgoCommands(Commands):
             "labels": {"description": description},
         }
 
-        await push_value(self.target, f"services.{service_name}", deploy_dict)
+        await push_value(
+            self.target,
+            f"services.{service_name}",
+            deploy_dict,
+            self.api,
+            await self._root_app(),
+        )
+        self._memo.clear()
+        if wait_timeout is not None:
+            await self._wait_many([service_name], wait_timeout)
 
     async def logs(self, service_name, prev):
         await self._logs(service_name, prev)
@@ -190,36 +421,68 @@ class ArgoCommands(Commands):
         url = self.log_url.format(service_name=service_name)
         webbrowser.open(url)
 
-    def ps(self, running_only):
-        self._ps(running_only)
+    def ps(self, running_only, targets=None):
+        self._ps(running_only, targets)
 
-    async def _get_service_manifest(self, service_name) -> dict:
-        await self._check_service(service_name)
+    async def _service_manifest(self, service_name) -> dict | None:
+        return await self._memoised(
+            ("manifest", service_name),
+            lambda: self._fetch_service_manifest(service_name),
+        )
 
+    async def _fetch_service_manifest(self, service_name) -> dict | None:
         namespace, app = extract_ns_app(self.target)
+        if self.api is not None:
+            return await asyncio.to_thread(
+                self.api.live_manifest,
+                f"{namespace}/{service_name}",
+                WORKLOAD_KINDS,
+                service_name,
+            )
+        command = f"argocd app manifests {namespace}/{service_name} --source live"
+        # Closing the stream at the first match kills argocd, so the rest of
+        # the manifests are never transferred
+        async with (
+            asyncio.timeout(shell.timeout),
+            aclosing(shell.run_command_lines(command)) as lines,
+        ):
+            return await find_workload(lines, service_name)
+
+    async def _get_service_manifest(self, service_name) -> dict:
+        await self._check_service(service_name)
+        return await self._find_service_manifest(service_name)
 
+    async def _find_service_manifest(self, service_name) -> dict:
         # get the manifests and determine if there is an 'enabled' label
         # which implies the service can be stopped/started
-        mani_resp = await shell.run_command(
-            f"argocd app manifests {namespace}/{service_name} --source live",
-        )
-        for manifest in YAML(typ="safe").load_all(mani_resp):
-            if not isinstance(manifest, dict):
-                continue
-            if manifest.get("kind") not in ["StatefulSet", "Deployment"]:
-                continue
-            if manifest.get("metadata", {}).get("name") != service_name:
-                continue
-            return manifest
-
-        raise CommandError(f"No manifest found for {service_name}")
+        manifest = await self._service_manifest(service_name)
+        if manifest is None:
+            raise CommandError(f"No manifest found for {service_name}")
+        return manifest
 
     async def _check_stoppable(self, service_name) -> None:
-        manifest = await self._get_service_manifest(service_name)
+        await self._check_stoppable_many([service_name])
 
-        labels = manifest["metadata"].get("labels")
-        if not (labels and "enabled" in labels):
-            raise CommandError(f"{service_name} does not support stop/start")
+    async def _check_stoppable_many(self, service_names) -> None:
+        """
+        Check the services against one listing of the apps, then fetch their
+        manifests together
+        """
+        await self._get_services()
+        services_list = [app["metadata"]["name"] for app in self.app_dicts]
+        for service_name in service_names:
+            if service_name not in services_list:
+                raise CommandError(
+                    f"Service '{service_name}' not found in {self.target}"
+                )
+
+        manifests = await asyncio.gather(
+            *(self._find_service_manifest(name) for name in service_names)
+        )
+        for service_name, manifest in zip(service_names, manifests, strict=True):
+            labels = manifest["metadata"].get("labels")
+            if not (labels and "enabled" in labels):
+                raise CommandError(f"{service_name} does not support stop/start")
 
     async def _check_description(self, service_name) -> str | None:
         manifest = await self._get_service_manifest(service_name)
@@ -229,122 +492,230 @@ class ArgoCommands(Commands):
             val if (val := manifest["metadata"]["labels"].get("description")) else None
         )
 
-    async def restart(self, service_name):
-        await self._check_stoppable(service_name)
-        namespace, app = extract_ns_app(self.target)
-        cmd = f"argocd app delete-resource {namespace}/{service_name} --kind StatefulSet --all"
-        await shell.run_command(cmd, skip_on_dryrun=True)
+    async def restart(self, service_names):
+        await self._check_stoppable_many(service_names)
+        await asyncio.gather(
+            *(self._delete_statefulsets(name) for name in service_names)
+        )
+        self._memo.clear()
 
-    async def start(self, service_name, commit=False):
-        await self._check_stoppable(service_name)
-        if commit:
-            await push_value(self.target, f"services.{service_name}.enabled", True)
+    async def _delete_statefulsets(self, service_name):
+        namespace, app = extract_ns_app(self.target)
+        if self.api is not None:
+            await asyncio.to_thread(
+                self.api.delete_resources, f"{namespace}/{service_name}", "StatefulSet"
+            )
         else:
-            await patch_value(self.target, f"services.{service_name}.enabled", True)
+            cmd = f"argocd app delete-resource {namespace}/{service_name} --kind StatefulSet --all"
+            await shell.run_command(cmd, skip_on_dryrun=True)
 
-    async def stop(self, service_name, commit=False):
-        await self._check_stoppable(service_name)
+    async def start(
+        self, service_names, commit=False, selector=None, wait_timeout=None
+    ):
+        service_names = self._select_services(service_names, selector)
+        await self._set_enabled(service_names, True, commit, wait_timeout)
+
+    async def stop(self, service_names, commit=False, selector=None, wait_timeout=None):
+        service_names = self._select_services(service_names, selector)
+        await self._set_enabled(service_names, False, commit, wait_timeout)
+
+    async def _set_enabled(
+        self,
+        service_names,
+        enabled: bool,
+        commit: bool,
+        wait_timeout: float | None = None,
+    ):
+        # One parameter update, or one commit, covers every service
+        await self._check_stoppable_many(service_names)
+        values: dict[str, YamlTypes] = {
+            f"services.{service_name}.enabled": enabled
+            for service_name in service_names
+        }
         if commit:
-            await push_value(self.target, f"services.{service_name}.enabled", False)
+            await push_values(self.target, values, self.api, await self._root_app())
         else:
-            await patch_value(self.target, f"services.{service_name}.enabled", False)
+            await patch_values(self.target, values, self.api)
+        self._memo.clear()
+        if wait_timeout is not None:
+            await self._wait_many(service_names, wait_timeout)
+
+    async def _wait_many(self, service_names, timeout):
+        # The root app syncs first as it creates the apps of new services
+        deadline = time.monotonic() + timeout
+        await wait_app(self.target, timeout, health=False, api=self.api)
+        namespace, app = extract_ns_app(self.target)
+        remaining = deadline - time.monotonic()
+        await asyncio.gather(
+            *(
+                wait_app(f"{namespace}/{name}", remaining, health=True, api=self.api)
+                for name in service_names
+            )
+        )
+        self._memo.clear()
 
-    async def _get_logs(self, service_name, prev) -> str:
+    def _logs_command(self, service_name, prev, tail=None) -> str:
         namespace, app = extract_ns_app(self.target)
-        await self._check_service(service_name)
         previous = "-p" if prev else ""
+        command = f"argocd app logs {namespace}/{service_name} {previous}"
+        if tail is not None:
+            command += f" --tail {tail}"
+        return command
 
+    async def _get_logs(self, service_name, prev, tail=None) -> str:
+        await self._check_service(service_name)
+        if self.api is not None:
+            namespace, app = extract_ns_app(self.target)
+            lines = self.api.logs(f"{namespace}/{service_name}", prev, tail)
+            return await asyncio.to_thread("".join, lines)
         logs = await shell.run_command(
-            f"argocd app logs {namespace}/{service_name} {previous}",
+            self._logs_command(service_name, prev, tail),
             error_OK=True,
         )
         return logs
 
+    async def _logs(self, service_name, prev):
+        await self._check_service(service_name)
+        if self.api is not None:
+            namespace, app = extract_ns_app(self.target)
+            lines = self.api.logs(f"{namespace}/{service_name}", prev)
+            await asyncio.to_thread(sys.stdout.writelines, lines)
+            return
+        # Stream rather than hold what may be a very large log in memory
+        with await shell.run_command_spooled(
+            self._logs_command(service_name, prev),
+            error_OK=True,
+        ) as logs:
+            logs.copy_to(sys.stdout)
+
     async def _get_services(self) -> None:
+        self.app_dicts = await self._memoised(("apps",), self._fetch_apps)
+
+    async def _fetch_apps(self) -> list[dict]:
         namespace, _ = extract_ns_app(self.target)
+        if self.api is not None:
+            return await asyncio.to_thread(self.api.list_apps, namespace)
         app_resp = await shell.run_command(
-            f"argocd app list --app-namespace {namespace} -o yaml",
+            f"argocd app list --app-namespace {namespace} -o json",
         )
-        self.app_dicts = YAML(typ="safe").load(app_resp)
-
-    async def _extract_app_manifests(self, app: dict):
-        namespace, _ = extract_ns_app(self.target)
+        return json.loads(app_resp)
 
-        service_data = {
-            "name": [],  # type: ignore
-            "label": [],
-            "version": [],
-            "ready": [],
-            "deployed": [],
-        }
+    async def _extract_app_services(self, app: dict) -> list[dict]:
+        """
+        The raw ps fields of an app's workload, read from the app list itself
 
+        The app list carries the health of each resource and the images of the
+        pods running, enough to tell ready from stopped without a manifests
+        call per app. Apps whose resources report no health, or that carry no
+        description label, fall back to their live manifests. Here deployed
+        is when the app was created, which a restart leaves unchanged.
+        """
+        name = app["metadata"]["name"]
+        labels = app["metadata"].get("labels") or {}
+        status = app.get("status") or {}
+        workloads = [
+            resource
+            for resource in status.get("resources") or []
+            if resource["kind"] in WORKLOAD_KINDS and resource["name"] == name
+        ]
+        if not workloads:
+            return []
+        # The workload may carry a label the app lacks
+        if "description" not in labels or any(
+            "health" not in resource for resource in workloads
+        ):
+            return await self._extract_app_manifests(app)
+
+        # A stopped service is scaled to zero, which argocd counts as healthy,
+        # so also require the images of a running pod
+        healthy = all(
+            resource["health"].get("status") == "Healthy" for resource in workloads
+        )
+        running = bool((status.get("summary") or {}).get("images"))
+        return [
+            {
+                "name": name,
+                "label": labels["description"],
+                "version": app["spec"]["source"]["targetRevision"],
+                "ready": int(healthy and running),
+                "deployed": app["metadata"]["creationTimestamp"],
+            }
+        ]
+
+    async def _extract_app_manifests(self, app: dict) -> list[dict]:
+        """
+        The raw ps fields of an app's workloads, read from its live manifests
+        """
         try:
             resources_dict = app["status"]["resources"]
         except KeyError:
-            return
-
-        for resource in resources_dict:
-            is_ready = False
-            if resource["kind"] in ["StatefulSet", "Deployment"]:
-                name = app["metadata"]["name"]
-
-                try:
-                    label = app["metadata"]["labels"]["device"]
-                except KeyError:
-                    label = "service"
+            return []
+
+        if not any(resource["kind"] in WORKLOAD_KINDS for resource in resources_dict):
+            return []
+
+        # check if replicas ready
+        name = app["metadata"]["name"]
+        manifest = await self._service_manifest(name)
+        if manifest is None:
+            return []
+        return [
+            {
+                "name": name,
+                "label": (manifest["metadata"].get("labels") or {}).get("description"),
+                "version": app["spec"]["source"]["targetRevision"],
+                "ready": (manifest.get("status") or {}).get("readyReplicas"),
+                "deployed": manifest["metadata"]["creationTimestamp"],
+            }
+        ]
+
+    async def _app_summary(self, app: dict) -> list[dict]:
+        """
+        The raw ps fields of an app, reused while the app is unchanged
 
-                # check if replicas ready
-                mani_resp = await shell.run_command(
-                    f"argocd app manifests {namespace}/{name} --source live",
-                )
-                for manifest in YAML(typ="safe").load_all(mani_resp):
-                    if not isinstance(manifest, dict):
-                        continue
-                    kind = manifest.get("kind")
-                    resource_name = manifest.get("metadata", {}).get("name")
-                    if kind in ["StatefulSet", "Deployment"] and resource_name == name:
-                        try:
-                            label = manifest["metadata"]["labels"]["description"]
-                        except KeyError:
-                            label = "service"
-
-                        try:
-                            is_ready = bool(manifest["status"]["readyReplicas"])
-                        except (
-                            KeyError,
-                            TypeError,
-                        ):  # Not ready if doesnt exist
-                            is_ready = False
-                        time_stamp = datetime.strptime(
-                            manifest["metadata"]["creationTimestamp"],
-                            "%Y-%m-%dT%H:%M:%SZ",
-                        )
-                        service_data["name"].append(name)
-                        service_data["label"].append(label)
-                        service_data["version"].append(
-                            app["spec"]["source"]["targetRevision"]
-                        )
-                        service_data["ready"].append(is_ready)
-                        service_data["deployed"].append(
-                            datetime.strftime(time_stamp, globals.TIME_FORMAT)
-                        )
-
-        service_df = polars.from_dict(service_data, schema=ServicesSchema)
-
-        async with self.async_lock:
-            if self.services_df.is_empty():
-                self.services_df = service_df
-            else:
-                self.services_df.extend(service_df)
+        argocd bumps the resourceVersion of an app whenever its status or
+        spec changes, so an app at the version last read needs no new
+        manifests.
+        """
+        name = app["metadata"]["name"]
+        version = app["metadata"].get("resourceVersion") or (
+            app.get("status") or {}
+        ).get("reconciledAt")
+        if version is None:
+            return await self._extract_app_services(app)
+        cached = self._summaries.get(name)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        records = await self._extract_app_services(app)
+        self._summaries[name] = (version, records)
+        return records
 
     async def _get_service_data(self):
         await self._get_services()
 
         async with asyncio.TaskGroup() as group:
-            for app in self.app_dicts:
-                group.create_task(self._extract_app_manifests(app))
+            tasks = [
+                group.create_task(self._app_summary(app)) for app in self.app_dicts
+            ]
+        # Forget apps that have gone
+        names = {app["metadata"]["name"] for app in self.app_dicts}
+        for name in self._summaries.keys() - names:
+            del self._summaries[name]
+
+        # Build the table once from every app's fields
+        raw_df = polars.DataFrame(
+            [record for task in tasks for record in task.result()],
+            schema=RAW_SERVICES_SCHEMA,
+        )
+        self.services_df = derive_services(raw_df)
 
     def _get_services_df(self, running_only) -> ServicesDataFrame:
+        # Validate the target here, not from the shared loop where it would
+        # block every other coroutine
+        self.target  # noqa: B018
+
+        # Each listing is fresh, as the monitor polls with this directly
+        self._memo.clear()
         # Clear the current dataframe before polling the current manifests
         self.services_df = self.services_df.clear()
 
@@ -357,6 +728,22 @@ class ArgoCommands(Commands):
             services_df = services_df.filter(polars.col("ready").eq(True))
         return ServicesDataFrame(services_df)
 
+    async def _list_targets(self) -> list[str]:
+        # Targets are the root apps, those that create the apps of services,
+        # named <namespace>/<app>
+        if self.api is not None:
+            apps = await asyncio.to_thread(self.api.list_apps)
+        else:
+            apps = json.loads(await shell.run_command("argocd app list -o json"))
+        return [
+            f"{app['metadata']['namespace']}/{app['metadata']['name']}"
+            for app in apps
+            if any(
+                resource.get("kind") == "Application"
+                for resource in (app.get("status") or {}).get("resources") or []
+            )
+        ]
+
     async def _check_service(self, service_name: str):
         """
         validate that there is a app with the given service_name
@@ -374,9 +761,8 @@ class ArgoCommands(Commands):
         """
         retries = 2
 
-        cmd = f"argocd app get {self._target}"
         try:
-            await shell.run_command(cmd, error_OK=False)
+            app_dicts = await get_app(self._target, self.api)
         except ShellError as e:
             if "Unauthenticated" in str(e) or "unspecified" in str(e):
                 retries -= 1
@@ -388,6 +774,8 @@ class ArgoCommands(Commands):
                 if not login or not typer.confirm("Login to ArgoCD?", default=True):
                     raise typer.Abort() from e
                 await shell.run_command(login, error_OK=False, skip_on_dryrun=True)
+                # Pick up the token the login wrote
+                self._api = None
 
                 # retry validation
                 await self._validate_target()
@@ -396,3 +784,6 @@ class ArgoCommands(Commands):
                 raise CommandError(f"Target '{self._target}' not found") from e
             else:
                 raise
+        else:
+            # Commands that commit to the repo reuse the app for its source
+            self._memo[("root",)] = app_dicts
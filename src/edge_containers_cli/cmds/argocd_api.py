@@ -0,0 +1,302 @@
+"""
+A direct client for the ArgoCD REST API, an alternative to running argocd
+
+The server and token come from the current context of the argocd config, as
+written by 'argocd login', or from ARGOCD_SERVER and ARGOCD_AUTH_TOKEN as the
+argocd CLI reads them.
+"""
+
+import json
+import os
+import time
+from collections.abc import Iterator
+from dataclasses import dataclass
+from pathlib import Path
+
+import requests
+from ruamel.yaml import YAML
+
+from edge_containers_cli import globals
+from edge_containers_cli.api import ApiClient, ApiError
+
+# gRPC status codes that argocd reports errors with
+_GRPC_CODES = {
+    2: "Unknown",
+    3: "InvalidArgument",
+    5: "NotFound",
+    7: "PermissionDenied",
+    16: "Unauthenticated",
+}
+
+
+class ArgoApiError(ApiError):
+    """
+    An error from the ArgoCD API server, worded as argocd reports it
+    """
+
+
+def _argocd_config_path() -> Path:
+    return Path.home() / ".config" / "argocd" / "config"
+
+
+def _named(entries: list[dict], name: str, key: str = "name") -> dict:
+    for entry in entries or []:
+        if entry.get(key) == name:
+            return entry
+    raise ArgoApiError(f"no entry for '{name}' in argocd config")
+
+
+def _app_settled(app: dict, health: bool, since: str = "") -> bool:
+    status = app.get("status") or {}
+    # A status from before the app was last refreshed may predate the change
+    if (status.get("reconciledAt") or "") < since:
+        return False
+    if (status.get("operationState") or {}).get("phase") == "Running":
+        return False
+    if (status.get("sync") or {}).get("status") != "Synced":
+        return False
+    return not health or (status.get("health") or {}).get("status") == "Healthy"
+
+
+def split_target(target: str) -> tuple[str, dict[str, str]]:
+    """
+    The API path and query parameters of an app given as <namespace>/<app>
+    """
+    namespace, app = target.split("/")
+    return f"/api/v1/applications/{app}", {"appNamespace": namespace}
+
+
+@dataclass
+class ArgoConfig:
+    """
+    Connection details for the current argocd context
+    """
+
+    server: str
+    token: str | None = None
+    verify: bool = True
+
+    @classmethod
+    def load(cls, path: Path | None = None) -> "ArgoConfig":
+        if (server := os.environ.get("ARGOCD_SERVER")) and (
+            token := os.environ.get("ARGOCD_AUTH_TOKEN")
+        ):
+            return cls(server=f"https://{server}", token=token)
+
+        path = path or _argocd_config_path()
+        try:
+            config = YAML(typ="safe").load(path)
+        except OSError as e:
+            raise ArgoApiError(
+                f"cannot read argocd config {path}, run 'argocd login': {e}"
+            ) from e
+
+        context = _named(config.get("contexts"), config["current-context"])
+        server = _named(config.get("servers"), context["server"], key="server")
+        user = _named(config.get("users"), context["user"])
+        scheme = "http" if server.get("plain-text") else "https"
+        return cls(
+            server=f"{scheme}://{context['server']}",
+            token=user.get("auth-token"),
+            verify=not server.get("insecure"),
+        )
+
+
+class ArgoApiClient(ApiClient):
+    """
+    The API calls made by ArgoCommands
+    """
+
+    error = ArgoApiError
+
+    def __init__(self, config: ArgoConfig, pool_size: int = globals.API_POOL_SIZE):
+        super().__init__(config.server, pool_size)
+        self.config = config
+        self.session.verify = config.verify
+        if config.token:
+            self.session.headers["Authorization"] = f"Bearer {config.token}"
+
+    @classmethod
+    def from_config(cls, path: Path | None = None) -> "ArgoApiClient":
+        return cls(ArgoConfig.load(path))
+
+    def _error_message(self, response: requests.Response) -> str:
+        try:
+            status = response.json()
+            code = _GRPC_CODES.get(status["code"], status["code"])
+            return f"rpc error: code = {code} desc = {status['message']}"
+        except (ValueError, KeyError):
+            return super()._error_message(response)
+
+    def list_apps(self, namespace: str | None = None) -> list[dict]:
+        """
+        The apps in the same form as 'argocd app list -o json'
+        """
+        params = {"appNamespace": namespace} if namespace else None
+        response = self.request("GET", "/api/v1/applications", params=params)
+        assert response is not None
+        return response.json().get("items") or []
+
+    def get_app(self, target: str, refresh: bool = False) -> dict | None:
+        """
+        The app in the same form as 'argocd app get -o json', optionally
+        asking argocd to refresh it from the repo first
+        """
+        path, params = split_target(target)
+        if refresh:
+            params["refresh"] = "normal"
+        response = self.request("GET", path, params=params, skip_on_dryrun=refresh)
+        return response.json() if response is not None else None
+
+    def _update_parameters(self, target: str, update) -> None:
+        app = self.get_app(target)
+        assert app is not None
+        spec = app["spec"]
+        helm = spec["source"].setdefault("helm", {})
+        helm["parameters"] = update(helm.get("parameters") or [])
+        path, params = split_target(target)
+        self.request(
+            "PUT",
+            f"{path}/spec",
+            params=params,
+            skip_on_dryrun=True,
+            data=json.dumps(spec),
+            headers={"Content-Type": "application/json"},
+        )
+
+    def set_parameters(self, target: str, values: dict[str, str]) -> None:
+        """
+        Override helm parameters of an app, as 'argocd app set -p'
+        """
+
+        def update(parameters: list[dict]) -> list[dict]:
+            kept = [p for p in parameters if p["name"] not in values]
+            return kept + [{"name": k, "value": v} for k, v in values.items()]
+
+        self._update_parameters(target, update)
+
+    def unset_parameters(self, target: str, keys: list[str]) -> None:
+        """
+        Remove the helm parameter overrides of keys and their children in one
+        update
+        """
+
+        def update(parameters: list[dict]) -> list[dict]:
+            return [
+                p
+                for p in parameters
+                if not any(
+                    p["name"] == key or p["name"].startswith(f"{key}.") for key in keys
+                )
+            ]
+
+        self._update_parameters(target, update)
+
+    def logs(
+        self, target: str, previous: bool, tail: int | None = None
+    ) -> Iterator[str]:
+        """
+        The log lines of an app's pods, as 'argocd app logs', read as the
+        server streams them
+        """
+        path, params = split_target(target)
+        params["follow"] = "false"
+        if previous:
+            params["previous"] = "true"
+        if tail is not None:
+            params["tailLines"] = str(tail)
+        response = self.request("GET", f"{path}/logs", params=params, stream=True)
+        assert response is not None
+        with response:
+            for line in response.iter_lines(decode_unicode=True):
+                if not line:
+                    continue
+                entry = json.loads(line)
+                if "error" in entry:
+                    raise ArgoApiError(entry["error"].get("message", str(entry)))
+                result = entry["result"]
+                if result.get("last"):
+                    return
+                yield result.get("content", "") + "\n"
+
+    def delete_resources(self, target: str, kind: str) -> None:
+        """
+        Delete every resource of kind in an app, as 'argocd app delete-resource
+        --kind <kind> --all'
+        """
+        app = self.get_app(target)
+        assert app is not None
+        path, params = split_target(target)
+        for resource in (app.get("status") or {}).get("resources") or []:
+            if resource.get("kind") != kind:
+                continue
+            self.request(
+                "DELETE",
+                f"{path}/resource",
+                params={
+                    **params,
+                    "namespace": resource.get("namespace", ""),
+                    "resourceName": resource["name"],
+                    "group": resource.get("group", ""),
+                    "version": resource.get("version", ""),
+                    "kind": kind,
+                },
+                skip_on_dryrun=True,
+            )
+
+    def live_manifest(
+        self, target: str, kinds: tuple[str, ...], name: str
+    ) -> dict | None:
+        """
+        The live state of the first resource of an app with one of the kinds
+        and the name, as found in 'argocd app manifests --source live'
+        """
+        path, params = split_target(target)
+        response = self.request("GET", f"{path}/managed-resources", params=params)
+        assert response is not None
+        for resource in response.json().get("items") or []:
+            # Only decode the live state of the resource wanted
+            if resource.get("kind") not in kinds or resource.get("name") != name:
+                continue
+            live_state = json.loads(resource.get("liveState") or "null")
+            if isinstance(live_state, dict):
+                return live_state
+        return None
+
+    def wait_app(self, target: str, timeout: float, health: bool = True) -> None:
+        """
+        Wait for an app to sync, and to be healthy if health, as 'argocd app
+        wait', reading the server's stream of changes to the app. The app is
+        refreshed first so that its status reflects any change just made.
+        """
+        namespace, app = target.split("/")
+        deadline = time.monotonic() + timeout
+        # argocd answers a refresh once the app has been reconciled
+        refreshed = self.get_app(target, refresh=True) or {}
+        since = (refreshed.get("status") or {}).get("reconciledAt") or ""
+        response = self.request(
+            "GET",
+            "/api/v1/stream/applications",
+            params={"name": app, "appNamespace": namespace},
+            skip_on_dryrun=True,
+            stream=True,
+            timeout=max(timeout, 1),
+        )
+        if response is None:
+            return
+        with response:
+            try:
+                for line in response.iter_lines():
+                    if not line:
+                        continue
+                    event = json.loads(line)
+                    if "error" in event:
+                        raise ArgoApiError(event["error"].get("message", str(event)))
+                    if _app_settled(event["result"]["application"], health, since):
+                        return
+                    if time.monotonic() > deadline:
+                        break
+            except requests.RequestException:
+                # The server went quiet for longer than the timeout
+                pass
+        raise ArgoApiError(f"timed out waiting for {target} to settle")
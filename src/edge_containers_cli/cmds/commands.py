@@ -1,6 +1,11 @@
+import fnmatch
+import glob
 from abc import ABC, abstractmethod
 from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
 from pathlib import Path
+from typing import Self
 
 import polars
 from natsort import natsorted
@@ -12,6 +17,7 @@ from edge_containers_cli import globals
 from edge_containers_cli.definitions import ENV, ECContext
 from edge_containers_cli.git import create_version_map
 from edge_containers_cli.logging import log
+from edge_containers_cli.shell import ShellError
 from edge_containers_cli.utils import _run_async, new_workdir
 
 
@@ -30,6 +36,28 @@ ServicesSchema = polars.Schema(
 )
 
 
+# Timestamps as given by the Kubernetes API
+K8S_TIME_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+
+
+def derive_services(raw_df: polars.DataFrame) -> polars.DataFrame:
+    """
+    Derive the ServicesSchema columns from raw fields as the backends find
+    them: name, label and version strings that may be null, the number of
+    ready replicas and a creation timestamp
+    """
+    return raw_df.select(
+        polars.col("name"),
+        polars.col("label").fill_null("service"),
+        polars.col("version"),
+        # Not ready if readyReplicas doesnt exist
+        polars.col("ready").cast(polars.Int64).fill_null(0).gt(0),
+        polars.col("deployed")
+        .str.strptime(polars.Datetime, K8S_TIME_FORMAT)
+        .dt.strftime(globals.TIME_FORMAT),
+    )
+
+
 class ServicesDataFrame(polars.DataFrame):
     def __init__(self, data: polars.DataFrame):
         super().__init__(data)
@@ -52,6 +80,7 @@ class Commands(ABC):
     params_optional: dict[str, list[str]] = {}  # Set optional parameters from the CLI
 
     def __init__(self, ctx: ECContext):
+        self._ctx = ctx
         self._target = ctx.target
         self._target_valid = False
         self._repo = ctx.repo
@@ -77,6 +106,8 @@ class Commands(ABC):
                     call_msg = f"{call_msg} [{', '.join(f'{k}={v}' for k, v in kwargs.items())}]"
                     return_msg = f"{return_msg} [{', '.join(f'{k}={v}' for k, v in kwargs.items())}]"
                 log_f(call_msg)
+                if attr_name[0] != "_":
+                    self._begin_command()
                 result = attr(*args, **kwargs)
                 log_f(return_msg)
                 return result
@@ -125,6 +156,7 @@ class Commands(ABC):
         description: str | None,
         args: str,
         confirm_callback: Callable[[str, str | None], None] | None = None,
+        wait_timeout: float | None = None,
     ) -> None:
         raise NotImplementedError
 
@@ -145,21 +177,48 @@ class Commands(ABC):
     async def log_history(self, service_name: str) -> None:
         raise NotImplementedError
 
-    def ps(self, running_only: bool) -> None:
+    def ps(self, running_only: bool, targets: list[str] | None = None) -> None:
         raise NotImplementedError
 
     @abstractmethod
-    async def restart(self, service_name: str) -> None:
+    async def restart(self, service_names: list[str]) -> None:
         raise NotImplementedError
 
     @abstractmethod
-    async def start(self, service_name: str, commit: bool = False) -> None:
+    async def start(
+        self,
+        service_names: list[str] | None,
+        commit: bool = False,
+        selector: str | None = None,
+        wait_timeout: float | None = None,
+    ) -> None:
+        """
+        Start the named services and those matching the selector glob
+        pattern, waiting up to wait_timeout seconds for them when given
+        """
         raise NotImplementedError
 
     @abstractmethod
-    async def stop(self, service_name: str, commit: bool = False) -> None:
+    async def stop(
+        self,
+        service_names: list[str] | None,
+        commit: bool = False,
+        selector: str | None = None,
+        wait_timeout: float | None = None,
+    ) -> None:
+        """
+        Stop the named services and those matching the selector glob pattern,
+        waiting up to wait_timeout seconds for them when given
+        """
         raise NotImplementedError
 
+    async def _wait_many(self, service_names: list[str], timeout: float) -> None:
+        """
+        Wait up to timeout seconds for the services to settle after a change,
+        for backends that apply changes after the command returns
+        """
+        return None
+
     async def template(self, svc_instance: Path, args: str) -> None:
         raise NotImplementedError
 
@@ -170,9 +229,94 @@ class Commands(ABC):
     def _get_services_df(self, running_only: bool) -> ServicesDataFrame:
         raise NotImplementedError
 
-    def _ps(self, running_only: bool) -> None:
+    def _begin_command(self) -> None:
+        """
+        Called as each public command starts, to drop state memoised by the
+        previous one
+        """
+        return None
+
+    def _start_watch(self) -> None:
+        """
+        Keep the services table current in the background, for backends
+        able to watch for changes rather than be polled
+        """
+        return None
+
+    def _stop_watch(self) -> None:
+        return None
+
+    async def _list_targets(self) -> list[str]:
+        raise CommandError("Target patterns are not supported by this backend")
+
+    def _with_target(self, target: str) -> Self:
+        """
+        A copy of these commands acting on another target
+        """
+        return type(self)(replace(self._ctx, target=target))
+
+    def _expand_targets(self, patterns: list[str]) -> list[str]:
+        """
+        Resolve target names, glob patterns matched against the targets the
+        backend can list and @FILE lists of either, one per line
+        """
+        targets: list[str] = []
+        for pattern in patterns:
+            if pattern.startswith("@"):
+                lines = Path(pattern[1:]).read_text().splitlines()
+                entries = [line.strip() for line in lines]
+                targets += self._expand_targets(
+                    [entry for entry in entries if entry and entry[0] != "#"]
+                )
+            elif glob.has_magic(pattern):
+                available = _run_async(self._list_targets())
+                targets += fnmatch.filter(available, pattern)
+            else:
+                targets.append(pattern)
+        return list(dict.fromkeys(targets))
+
+    def _ps_many(self, patterns: list[str], running_only: bool) -> None:
+        """
+        List the services of several targets in one table, querying a
+        bounded number of targets at a time
+        """
+
+        def target_df(target: str, commands: Commands) -> polars.DataFrame | None:
+            try:
+                # Validate the target in this thread, as validating it from the
+                # shared loop would hold up every other target's queries
+                commands.target  # noqa: B018
+                services_df = commands._get_services_df(running_only)  # noqa: SLF001
+            except (CommandError, ShellError) as e:
+                log.error(f"{target}: {e}")
+                return None
+            return services_df.select(polars.lit(target).alias("target"), polars.all())
+
+        targets = self._expand_targets(patterns)
+        if not targets:
+            raise CommandError(f"No targets match {' '.join(patterns)}")
+        # Build the copies here, so they share whatever the first one sets up
+        copies = [self._with_target(target) for target in targets]
+        with ThreadPoolExecutor(max_workers=globals.PS_CONCURRENCY) as pool:
+            frames = [
+                df for df in pool.map(target_df, targets, copies) if df is not None
+            ]
+
+        self._print_table(
+            polars.concat(frames).sort(["target", "name"])
+            if frames
+            else polars.DataFrame(schema={"target": polars.String, **ServicesSchema})
+        )
+
+    def _ps(self, running_only: bool, targets: list[str] | None = None) -> None:
+        if targets:
+            self._ps_many(targets, running_only)
+            return
         services_df = self._get_services_df(running_only)
+        # Sort by service name
+        self._print_table(services_df.sort("name"))
 
+    def _print_table(self, services_df: polars.DataFrame) -> None:
         console = Console()
         table = Table(
             *services_df.columns,
@@ -182,22 +326,49 @@ class Commands(ABC):
             box=box.ROUNDED,
         )
 
-        # Sort by service name
-        services_df = services_df.sort("name")
         for row in services_df.to_dicts():
             table.add_row(*list(map(str, row.values())))
         console.print(table)
 
     @abstractmethod
-    async def _get_logs(self, service_name: str, prev: bool) -> str:
+    async def _get_logs(
+        self, service_name: str, prev: bool, tail: int | None = None
+    ) -> str:
         raise NotImplementedError
 
+    async def _get_new_logs(
+        self, service_name: str, since: str | None, tail: int | None = None
+    ) -> tuple[str, str | None]:
+        """
+        The log lines after the since cursor and the cursor to pass next time.
+        A None cursor means the text is the whole log, replacing what came
+        before, which is all backends without incremental fetching return.
+        """
+        return await self._get_logs(service_name, False, tail), None
+
     async def _logs(self, service_name: str, prev: bool) -> None:
         print(await self._get_logs(service_name, prev))
 
     async def _validate_target(self) -> None:
         raise NotImplementedError
 
+    def _select_services(
+        self, service_names: list[str] | None, selector: str | None
+    ) -> list[str]:
+        """
+        The named services followed by those matching the selector glob
+        pattern, without repeats
+        """
+        selected = list(service_names or [])
+        if selector:
+            matched = fnmatch.filter(self._all_services(), selector)
+            if not matched:
+                raise CommandError(f"No services match '{selector}' in {self.target}")
+            selected += matched
+        if not selected:
+            raise CommandError("No services given, name them or use --selector")
+        return list(dict.fromkeys(selected))
+
     def _running_services(self) -> list[str]:
         return self._get_services_df(running_only=True)["name"].to_list()
 
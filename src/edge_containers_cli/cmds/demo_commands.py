@@ -73,10 +73,16 @@ class DemoCommands(Commands):
     A class for implementing the Kubernetes based commands
     """
 
+    params_opt_out = {
+        "stop": ["wait", "wait_timeout"],
+        "start": ["wait", "wait_timeout"],
+    }
+
     def __init__(
         self,
         ctx: ECContext,
     ):
+        self._ctx = ctx
         self._target = "Demo Beamline"
         self._target_valid = False
         self._stateDF = SampleServicesDataFrame
@@ -95,17 +101,21 @@ class DemoCommands(Commands):
         pass
 
     @demo_message
-    def ps(self, running_only):
-        self._ps(running_only)
+    def ps(self, running_only, targets=None):
+        self._ps(running_only, targets)
 
     @demo_message
-    async def restart(self, service_name):
-        await self._stop(service_name, commit=False)
-        await self._start(service_name, commit=False)
+    async def restart(self, service_names):
+        for service_name in service_names:
+            await self._stop(service_name, commit=False)
+            await self._start(service_name, commit=False)
 
     @demo_message
-    async def start(self, service_name, commit=False):
-        await self._start(service_name, commit=commit)
+    async def start(
+        self, service_names, commit=False, selector=None, wait_timeout=None
+    ):
+        for service_name in self._select_services(service_names, selector):
+            await self._start(service_name, commit=commit)
 
     async def _start(self, service_name, commit=False):
         await self._check_service(service_name)
@@ -118,8 +128,9 @@ class DemoCommands(Commands):
         )
 
     @demo_message
-    async def stop(self, service_name, commit=False):
-        await self._stop(service_name, commit=commit)
+    async def stop(self, service_names, commit=False, selector=None, wait_timeout=None):
+        for service_name in self._select_services(service_names, selector):
+            await self._stop(service_name, commit=commit)
 
     async def _stop(self, service_name, commit=False):
         await self._check_service(service_name)
@@ -131,13 +142,15 @@ class DemoCommands(Commands):
             .alias("ready")
         )
 
-    async def _get_logs(self, service_name, prev) -> str:
+    async def _get_logs(self, service_name, prev, tail=None) -> str:
         await self._check_service(service_name)
         if self.lorem_count < self.lorem_max:
             self.lorem_count += self.lorem_step
         else:
             self.lorem_count = self.lorem_min
         logs_list = ["Lorem ipsum dolor sit amet"] * self.lorem_count
+        if tail is not None:
+            logs_list = logs_list[-tail:]
         return "\n".join(logs_list)
 
     def _get_services_df(self, running_only) -> ServicesDataFrame:
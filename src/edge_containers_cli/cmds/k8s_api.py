@@ -0,0 +1,297 @@
+"""
+A direct client for the Kubernetes API, an alternative to running kubectl
+
+Credentials come from the current context of the kubeconfig, as used by
+kubectl.
+"""
+
+import base64
+import gzip
+import json
+import os
+import subprocess
+import weakref
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+import requests
+from ruamel.yaml import YAML
+
+from edge_containers_cli import globals
+from edge_containers_cli.api import ApiClient, ApiError
+from edge_containers_cli.utils import new_workdir
+
+
+class K8sApiError(ApiError):
+    """
+    An error from the Kubernetes API server, worded as kubectl reports it
+    """
+
+
+def _kubeconfig_path() -> Path:
+    paths = os.environ.get("KUBECONFIG", "").split(os.pathsep)
+    if paths[0]:
+        return Path(paths[0])
+    return Path.home() / ".kube" / "config"
+
+
+def _named(entries: list[dict], name: str, kind: str) -> dict:
+    for entry in entries or []:
+        if entry.get("name") == name:
+            return entry[kind]
+    raise K8sApiError(f"error: no {kind} named '{name}' in kubeconfig")
+
+
+@dataclass
+class KubeConfig:
+    """
+    Connection details for the current kubeconfig context
+    """
+
+    server: str
+    verify: str | bool = True
+    token: str | None = None
+    cert: tuple[str, str] | None = None
+    exec_config: dict | None = None
+    data_dir: Path | None = field(default=None, repr=False)
+
+    @classmethod
+    def load(cls, path: Path | None = None) -> "KubeConfig":
+        path = path or _kubeconfig_path()
+        try:
+            config = YAML(typ="safe").load(path)
+        except OSError as e:
+            raise K8sApiError(f"error: cannot read kubeconfig {path}: {e}") from e
+
+        context = _named(config.get("contexts"), config["current-context"], "context")
+        cluster = _named(config.get("clusters"), context["cluster"], "cluster")
+        user = _named(config.get("users"), context["user"], "user")
+        kube_config = cls(server=cluster["server"].rstrip("/"))
+
+        def local_file(key: str) -> str | None:
+            """A path from the kubeconfig, or its inline -data written to disk"""
+            if data := cluster.get(f"{key}-data") or user.get(f"{key}-data"):
+                return kube_config._write_data(key, base64.b64decode(data))
+            if value := cluster.get(key) or user.get(key):
+                return str(path.parent / value)
+            return None
+
+        if cluster.get("insecure-skip-tls-verify"):
+            kube_config.verify = False
+        elif certificate_authority := local_file("certificate-authority"):
+            kube_config.verify = certificate_authority
+
+        kube_config.token = user.get("token")
+        if token_file := user.get("tokenFile"):
+            kube_config.token = (path.parent / token_file).read_text().strip()
+        client_certificate = local_file("client-certificate")
+        client_key = local_file("client-key")
+        if client_certificate and client_key:
+            kube_config.cert = (client_certificate, client_key)
+        if exec_config := user.get("exec"):
+            kube_config.exec_config = exec_config
+            kube_config.refresh()
+        return kube_config
+
+    def _write_data(self, key: str, data: bytes) -> str:
+        if self.data_dir is None:
+            workdir = new_workdir()
+            self.data_dir = workdir.create()
+            weakref.finalize(self, workdir.cleanup)
+        data_file = self.data_dir / key
+        data_file.write_bytes(data)
+        data_file.chmod(0o600)
+        return str(data_file)
+
+    def refresh(self) -> None:
+        """
+        Fetch fresh credentials from the exec plugin, such as an OIDC helper
+        """
+        if not self.exec_config:
+            return
+        env = dict(os.environ)
+        env.update(
+            {var["name"]: var["value"] for var in self.exec_config.get("env") or []}
+        )
+        result = subprocess.run(
+            [self.exec_config["command"], *(self.exec_config.get("args") or [])],
+            env=env,
+            capture_output=True,
+            text=True,
+        )
+        if result.returncode != 0:
+            raise K8sApiError(f"error: kubeconfig exec plugin failed: {result.stderr}")
+        status = json.loads(result.stdout)["status"]
+        self.token = status.get("token", self.token)
+        if "clientCertificateData" in status:
+            self.cert = (
+                self._write_data(
+                    "client-certificate", status["clientCertificateData"].encode()
+                ),
+                self._write_data("client-key", status["clientKeyData"].encode()),
+            )
+
+
+def _helm_release(secret: dict) -> dict:
+    """
+    Decode the release record helm stores in a secret: base64 by kubernetes,
+    then base64 again over gzipped JSON by helm
+    """
+    data = base64.b64decode(base64.b64decode(secret["data"]["release"]))
+    if data[:2] == b"\x1f\x8b":
+        data = gzip.decompress(data)
+    return json.loads(data)
+
+
+class K8sApiClient(ApiClient):
+    """
+    The API calls made by K8sCommands
+    """
+
+    error = K8sApiError
+
+    def __init__(self, config: KubeConfig, pool_size: int = globals.API_POOL_SIZE):
+        super().__init__(config.server, pool_size)
+        self.config = config
+        self._authorise()
+
+    @classmethod
+    def from_kubeconfig(cls, path: Path | None = None) -> "K8sApiClient":
+        return cls(KubeConfig.load(path))
+
+    def _authorise(self) -> None:
+        self.session.verify = self.config.verify
+        self.session.cert = self.config.cert
+        if self.config.token:
+            self.session.headers["Authorization"] = f"Bearer {self.config.token}"
+
+    def _refresh_credentials(self) -> bool:
+        # Credentials from an exec plugin expire, refresh them once
+        if not self.config.exec_config:
+            return False
+        self.config.refresh()
+        self._authorise()
+        return True
+
+    def _error_message(self, response: requests.Response) -> str:
+        try:
+            status = response.json()
+            return f"Error from server ({status['reason']}): {status['message']}"
+        except (ValueError, KeyError):
+            return super()._error_message(response)
+
+    def get_namespace(self, namespace: str) -> dict:
+        response = self.request("GET", f"/api/v1/namespaces/{namespace}")
+        assert response is not None
+        return response.json()
+
+    def list_namespaces(self) -> list[dict]:
+        response = self.request("GET", "/api/v1/namespaces")
+        assert response is not None
+        return response.json()["items"]
+
+    def list_statefulsets(
+        self, namespace: str, selector: str, field_selector: str | None = None
+    ) -> dict:
+        params = {"labelSelector": selector}
+        if field_selector:
+            params["fieldSelector"] = field_selector
+        response = self.request(
+            "GET",
+            f"/apis/apps/v1/namespaces/{namespace}/statefulsets",
+            params=params,
+        )
+        assert response is not None
+        return response.json()
+
+    def list_helm_releases(self, namespace: str) -> list[dict]:
+        """
+        The deployed helm releases in the same form as 'helm list -o json'
+        """
+        response = self.request(
+            "GET",
+            f"/api/v1/namespaces/{namespace}/secrets",
+            params={"labelSelector": "owner=helm,status=deployed"},
+        )
+        assert response is not None
+        releases = []
+        for secret in response.json()["items"]:
+            release = _helm_release(secret)
+            releases.append(
+                {
+                    "name": release["name"],
+                    "app_version": release["chart"]["metadata"].get("appVersion", ""),
+                }
+            )
+        return releases
+
+    def scale_statefulset(self, namespace: str, name: str, replicas: int) -> None:
+        self.request(
+            "PATCH",
+            f"/apis/apps/v1/namespaces/{namespace}/statefulsets/{name}/scale",
+            skip_on_dryrun=True,
+            data=json.dumps({"spec": {"replicas": replicas}}),
+            headers={"Content-Type": "application/merge-patch+json"},
+        )
+
+    def delete_pods(self, namespace: str, selector: str) -> list[str]:
+        """
+        Delete the pods matching selector, returning the names deleted
+        """
+        response = self.request(
+            "DELETE",
+            f"/api/v1/namespaces/{namespace}/pods",
+            params={"labelSelector": selector},
+            skip_on_dryrun=True,
+        )
+        if response is None:
+            return []
+        return [pod["metadata"]["name"] for pod in response.json().get("items", [])]
+
+    def logs(
+        self,
+        namespace: str,
+        selector: str,
+        previous: bool,
+        stream: bool = False,
+        tail: int | None = None,
+        since: str | None = None,
+        timestamps: bool = False,
+    ) -> requests.Response:
+        """
+        The logs of the first pod matching selector, as kubectl picks the pod
+        for 'kubectl logs statefulset/<name>'
+
+        args:
+            tail: only the last tail lines
+            since: only lines from this RFC3339 time, to the second
+            timestamps: prefix each line with its timestamp
+        """
+        response = self.request(
+            "GET",
+            f"/api/v1/namespaces/{namespace}/pods",
+            params={"labelSelector": selector},
+        )
+        assert response is not None
+        pods = response.json()["items"]
+        if not pods:
+            raise K8sApiError(f"error: no pods found for selector {selector}")
+        pod = pods[0]["metadata"]["name"]
+        params: dict[str, Any] = {}
+        if previous:
+            params["previous"] = "true"
+        if tail is not None:
+            params["tailLines"] = tail
+        if since is not None:
+            params["sinceTime"] = since
+        if timestamps:
+            params["timestamps"] = "true"
+        response = self.request(
+            "GET",
+            f"/api/v1/namespaces/{namespace}/pods/{pod}/log",
+            params=params,
+            stream=stream,
+        )
+        assert response is not None
+        return response
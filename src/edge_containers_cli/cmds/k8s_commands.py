@@ -5,12 +5,15 @@ Relies on the Helm class for deployment aspects.
 """
 
 import asyncio
+import functools
+import re
+import sys
 import webbrowser
 from datetime import datetime
 from io import StringIO
+from typing import Self
 
 import polars
-from ruamel.yaml import YAML
 
 from edge_containers_cli.cmds.commands import (
     CommandError,
@@ -18,11 +21,57 @@ from edge_containers_cli.cmds.commands import (
     ServicesDataFrame,
 )
 from edge_containers_cli.cmds.helm import Helm
-from edge_containers_cli.definitions import ECContext
-from edge_containers_cli.globals import TIME_FORMAT
+from edge_containers_cli.cmds.k8s_api import K8sApiClient, K8sApiError
+from edge_containers_cli.cmds.k8s_informer import StatefulSetInformer
+from edge_containers_cli.cmds.k8s_services import (
+    STS_JSONPATH,
+    STS_SCHEMA,
+    read_sts_table,
+    services_frame,
+    sts_frame,
+)
+from edge_containers_cli.definitions import ECContext, ECTransports
+from edge_containers_cli.logging import log
 from edge_containers_cli.shell import ShellError, shell
 from edge_containers_cli.utils import _run_async
 
+_LOG_TIMESTAMP = re.compile(r"(\d{4}-\d\d-\d\dT\d\d:\d\d:\d\d)(?:\.(\d{1,9}))?Z")
+
+
+def _log_time(stamp: str) -> str:
+    """
+    A log timestamp padded to nanoseconds so that timestamps compare as
+    strings, kubernetes trims trailing zeros from the fraction
+    """
+    match = _LOG_TIMESTAMP.fullmatch(stamp)
+    if match is None:
+        raise ValueError(f"not a log timestamp: {stamp}")
+    return f"{match[1]}.{(match[2] or '').ljust(9, '0')}"
+
+
+def split_log_timestamps(text: str, since: str | None) -> tuple[str, str | None]:
+    """
+    Strip the timestamps that 'kubectl logs --timestamps' puts before each
+    line, dropping the lines at or before since
+
+    --since-time only has a resolution of seconds so the lines already seen in
+    that second come back again. Returns the log text and the timestamp of the
+    last line, or None when the text is not a log, such as an error message.
+    """
+    lines = []
+    cursor = since
+    after = _log_time(since) if since is not None else ""
+    for line in text.splitlines(keepends=True):
+        stamp, _, message = line.partition(" ")
+        try:
+            line_time = _log_time(stamp)
+        except ValueError:
+            return text, None
+        if line_time > after:
+            lines.append(message)
+            cursor = stamp
+    return "".join(lines), cursor
+
 
 class K8sCommands(Commands):
     """
@@ -30,8 +79,8 @@ class K8sCommands(Commands):
     """
 
     params_opt_out = {
-        "stop": ["commit"],
-        "start": ["commit"],
+        "stop": ["commit", "wait", "wait_timeout"],
+        "start": ["commit", "wait", "wait_timeout"],
     }
 
     def __init__(
@@ -40,9 +89,27 @@ class K8sCommands(Commands):
     ):
         super().__init__(ctx)
 
-        self.sts_dicts = {}
+        self.sts_df = polars.DataFrame(schema=STS_SCHEMA)
         self.services_df = polars.DataFrame()
         self.async_lock = asyncio.Lock()
+        self._transport = ctx.transport
+        self._api: K8sApiClient | None = None
+        self.informer: StatefulSetInformer | None = None
+
+    @property
+    def api(self) -> K8sApiClient | None:
+        """
+        The API client when the API transport is selected, else None
+        """
+        if self._transport is ECTransports.API and self._api is None:
+            self._api = K8sApiClient.from_kubeconfig()
+        return self._api
+
+    def _with_target(self, target: str) -> Self:
+        # Targets share one client and its pooled connections
+        commands = super()._with_target(target)
+        commands._api = self.api  # noqa: SLF001
+        return commands
 
     async def attach(self, service_name):
         await self._check_service(service_name)
@@ -58,8 +125,16 @@ class K8sCommands(Commands):
         )
 
     async def deploy(
-        self, service_name, version, description, args, confirm_callback=None
+        self,
+        service_name,
+        version,
+        description,
+        args,
+        confirm_callback=None,
+        wait_timeout=None,
     ):
+        if wait_timeout is not None:
+            args = f"{args} --wait --timeout {wait_timeout}s"
         if not version:
             latest_version = await self._get_latest_version(service_name)
             version = latest_version
@@ -94,29 +169,58 @@ class K8sCommands(Commands):
         url = self.log_url.format(service_name=service_name)
         webbrowser.open(url)
 
-    def ps(self, running_only):
-        self._ps(running_only)
-
-    async def restart(self, service_name):
-        await self._check_service(service_name)
-        pod_name = await shell.run_command(
-            f"kubectl get -n {self.target} pod -l app={service_name} -o name",
-        )
-        await shell.run_command(
-            f"kubectl delete -n {self.target} {pod_name}", skip_on_dryrun=True
-        )
-
-    async def start(self, service_name, commit=False):
-        await self._check_service(service_name)
-        await shell.run_command(
-            f"kubectl scale -n {self.target} statefulset {service_name} --replicas=1",
-            skip_on_dryrun=True,
-        )
+    def ps(self, running_only, targets=None):
+        self._ps(running_only, targets)
+
+    async def restart(self, service_names):
+        # Deleting the pods lets their statefulsets recreate them. One label
+        # selector covers every service and a missing service shows up as no
+        # pod deleted, so no lookup is needed first.
+        selector = f"app in ({','.join(service_names)})"
+        if self.api is not None:
+            deleted = await asyncio.to_thread(
+                self.api.delete_pods, self.target, selector
+            )
+        else:
+            result = await shell.run_command(
+                f'kubectl delete pod -n {self.target} -l "{selector}"',
+                skip_on_dryrun=True,
+            )
+            deleted = re.findall(r'pod "(\S+)" deleted', result)
+        if shell.dry_run:
+            return
+
+        restarted = {pod.rsplit("-", 1)[0] for pod in deleted}
+        missing = [name for name in service_names if name not in restarted]
+        if missing:
+            raise CommandError(
+                f"No running pods found for {', '.join(missing)} in {self.target}"
+            )
 
-    async def stop(self, service_name, commit=False):
-        await self._check_service(service_name)
+    async def start(
+        self, service_names, commit=False, selector=None, wait_timeout=None
+    ):
+        await self._scale(self._select_services(service_names, selector), 1)
+
+    async def stop(self, service_names, commit=False, selector=None, wait_timeout=None):
+        await self._scale(self._select_services(service_names, selector), 0)
+
+    async def _scale(self, service_names, replicas: int):
+        await self._check_services(service_names)
+        if self.api is not None:
+            await asyncio.gather(
+                *(
+                    asyncio.to_thread(
+                        self.api.scale_statefulset, self.target, name, replicas
+                    )
+                    for name in service_names
+                )
+            )
+            return
+        # kubectl scales every named statefulset in one call
         await shell.run_command(
-            f"kubectl scale -n {self.target} statefulset {service_name} --replicas=0 ",
+            f"kubectl scale -n {self.target} statefulset "
+            f"{' '.join(service_names)} --replicas={replicas}",
             skip_on_dryrun=True,
         )
 
@@ -133,77 +237,39 @@ class K8sCommands(Commands):
         )
         await chart.deploy_local(svc_instance)
 
-    async def _get_services(self) -> None:
-        # Get all statefulset services (running & not running)
-        kubectl_res = await shell.run_command(
-            f'kubectl get statefulset -l "is_ioc==true" -n {self.target} -o yaml',
-        )
-
-        self.sts_dicts = YAML(typ="safe").load(kubectl_res)
-
-    async def _extract_services_df(self):
-        service_data = {
-            "name": [],  # type: ignore
-            "label": [],
-            "ready": [],
-            "deployed": [],
-        }
-        if self.sts_dicts["items"]:
-            for sts in self.sts_dicts["items"]:
-                name = sts["metadata"]["name"]
-                try:
-                    label = sts["metadata"]["labels"]["description"]
-                except KeyError:
-                    label = "service"
-                time_stamp = datetime.strptime(
-                    sts["metadata"]["creationTimestamp"], "%Y-%m-%dT%H:%M:%SZ"
-                )
-                try:
-                    is_ready = bool(sts["status"]["readyReplicas"])
-                except KeyError:  # Not ready if doesnt exist
-                    is_ready = False
-
-                # Fill app data
-                service_data["name"].append(name)
-                service_data["label"].append(label)
-                service_data["ready"].append(is_ready)
-                service_data["deployed"].append(
-                    datetime.strftime(time_stamp, TIME_FORMAT)
-                )
-
-        services_df = polars.from_dict(
-            service_data,
-            schema=polars.Schema(
-                {
-                    "name": polars.String,
-                    "label": polars.String,
-                    "ready": polars.Boolean,
-                    "deployed": polars.String,
-                }
-            ),
+    async def _get_statefulsets(self, target: str) -> None:
+        # Get all statefulset services (running & not running), requesting
+        # only the fields shown by ps rather than the full objects
+        if self.api is not None:
+            sts_list = await asyncio.to_thread(
+                self.api.list_statefulsets, target, "is_ioc==true"
+            )
+            self.sts_df = sts_frame(sts_list["items"])
+            return
+        sts_table = await shell.run_command(
+            f'kubectl get statefulset -l "is_ioc==true" -n {target} '
+            f"-o jsonpath='{STS_JSONPATH}'",
         )
-
-        # Adds the version for all services
-        helm_out = str(await shell.run_command(f"helm list -n {self.target} -o json"))
+        self.sts_df = read_sts_table(sts_table)
+
+    async def _get_helm_versions(self, target: str) -> polars.DataFrame:
+        if self.api is not None:
+            releases = await asyncio.to_thread(self.api.list_helm_releases, target)
+            return polars.DataFrame(
+                [(release["name"], release["app_version"]) for release in releases],
+                schema=polars.Schema({"name": polars.String, "version": polars.String}),
+                orient="row",
+            )
+        helm_out = str(await shell.run_command(f"helm list -n {target} -o json"))
         if helm_out == "[]\n":
-            helm_df = polars.DataFrame(
+            return polars.DataFrame(
                 schema=polars.Schema({"name": polars.String, "version": polars.String})
             )
-        else:
-            helm_df = polars.read_json(StringIO(str(helm_out)))
-            helm_df = helm_df.rename({"app_version": "version"})
-
-        services_df = services_df.join(
-            helm_df.select(["name", "version"]),
-            on="name",
-            how="left",
-            coalesce=True,
-        )
+        helm_df = polars.read_json(StringIO(str(helm_out)))
+        return helm_df.rename({"app_version": "version"})
 
-        # Arrange columns
-        services_df = services_df.select(
-            ["name", "label", "version", "ready", "deployed"]
-        )
+    async def _extract_services_df(self, helm_df: polars.DataFrame):
+        services_df = services_frame(self.sts_df, helm_df)
 
         async with self.async_lock:
             if self.services_df.is_empty():
@@ -211,40 +277,180 @@ class K8sCommands(Commands):
             else:
                 self.services_df.extend(services_df)
 
-    async def _get_service_data(self):
-        await self._get_services()
-        await self._extract_services_df()
+    async def _get_service_data(self, target: str):
+        # The statefulsets and helm releases are independent so query together
+        async with asyncio.TaskGroup() as group:
+            group.create_task(self._get_statefulsets(target))
+            helm_task = group.create_task(self._get_helm_versions(target))
+        await self._extract_services_df(helm_task.result())
 
     def _get_services_df(self, running_only) -> ServicesDataFrame:
-        # Clear the current dataframe before polling the current manifests
-        self.services_df = self.services_df.clear()
+        if self.informer is not None and self.informer.synced:
+            services_df = self.informer.services_df()
+        else:
+            # Validate the target here, not from the shared loop where the
+            # concurrent queries below would race to validate it
+            target = self.target
+            log.debug(f"Listing services in {target}")
 
-        # Helper function being used to help run asynchronously
-        _run_async(self._get_service_data())
+            # Clear the current dataframe before polling the current manifests
+            self.services_df = self.services_df.clear()
 
-        services_df = self.services_df
+            # Helper function being used to help run asynchronously
+            _run_async(self._get_service_data(target))
+
+            services_df = self.services_df
 
         if running_only:
             services_df = services_df.filter(polars.col("ready").eq(True))
         return ServicesDataFrame(services_df)
 
-    async def _get_logs(self, service_name, prev):
-        await self._check_service(service_name)
-        previous = "-p" if prev else ""
+    def _start_watch(self) -> None:
+        if self.informer is None:
+            target = self.target
+            self.informer = StatefulSetInformer(
+                target, functools.partial(self._get_helm_versions, target)
+            )
+            self.informer.start()
+
+    def _stop_watch(self) -> None:
+        if self.informer is not None:
+            self.informer.stop()
+            self.informer = None
 
+    def _logs_command(
+        self, service_name, prev, tail=None, since=None, timestamps=False
+    ) -> str:
+        previous = "-p" if prev else ""
+        command = f"kubectl -n {self.target} logs statefulset/{service_name} {previous}"
+        if tail is not None:
+            command += f" --tail={tail}"
+        if since is not None:
+            command += f" --since-time={since}"
+        if timestamps:
+            command += " --timestamps"
+        return command
+
+    async def _get_logs(
+        self, service_name, prev, tail=None, since=None, timestamps=False
+    ):
+        await self._check_service(service_name)
+        if self.api is not None:
+            try:
+                response = await asyncio.to_thread(
+                    self.api.logs,
+                    self.target,
+                    f"app={service_name}",
+                    prev,
+                    tail=tail,
+                    since=since,
+                    timestamps=timestamps,
+                )
+            except K8sApiError as e:
+                return str(e)
+            return response.text
         logs = await shell.run_command(
-            f"kubectl -n {self.target} logs statefulset/{service_name} {previous}",
+            self._logs_command(service_name, prev, tail, since, timestamps),
             error_OK=True,
         )
         return logs
 
+    async def _get_new_logs(self, service_name, since, tail=None):
+        # Fetch only from the second of the last line seen rather than the
+        # whole log again
+        logs = await self._get_logs(
+            service_name, False, tail=tail, since=since, timestamps=True
+        )
+        return split_log_timestamps(logs, since)
+
+    async def _logs(self, service_name, prev):
+        await self._check_service(service_name)
+        if self.api is not None:
+            response = await asyncio.to_thread(
+                self.api.logs, self.target, f"app={service_name}", prev, stream=True
+            )
+            response.encoding = response.encoding or "utf-8"
+            with response:
+                for text in response.iter_content(chunk_size=None, decode_unicode=True):
+                    sys.stdout.write(text)
+            return
+        # Stream rather than hold what may be a very large log in memory
+        with await shell.run_command_spooled(
+            self._logs_command(service_name, prev),
+            error_OK=True,
+        ) as logs:
+            logs.copy_to(sys.stdout)
+
+    async def _list_targets(self) -> list[str]:
+        if self.api is not None:
+            namespaces = await asyncio.to_thread(self.api.list_namespaces)
+            return [namespace["metadata"]["name"] for namespace in namespaces]
+        names = await shell.run_command("kubectl get namespaces -o name")
+        return [name.removeprefix("namespace/") for name in names.split()]
+
+    async def _check_service(self, service_name):
+        """
+        Look up the one statefulset rather than listing the namespace
+        """
+        if self.informer is not None and self.informer.synced:
+            found = service_name in self.informer
+        elif self.api is not None:
+            sts_list = await asyncio.to_thread(
+                self.api.list_statefulsets,
+                self.target,
+                "is_ioc==true",
+                f"metadata.name={service_name}",
+            )
+            found = bool(sts_list["items"])
+        else:
+            # kubectl exits 0 with "No resources found" when nothing matches
+            names = await shell.run_command(
+                f'kubectl get statefulset -l "is_ioc==true" -n {self.target} '
+                f"--field-selector metadata.name={service_name} -o name",
+            )
+            found = f"statefulset.apps/{service_name}" in names.split()
+        if not found:
+            raise CommandError(f"Service '{service_name}' not found in {self.target}")
+
+    async def _check_services(self, service_names):
+        """
+        Check several services against one listing of the namespace
+        """
+        if len(service_names) == 1:
+            await self._check_service(service_names[0])
+            return
+        if self.informer is not None and self.informer.synced:
+            found = [name for name in service_names if name in self.informer]
+        elif self.api is not None:
+            sts_list = await asyncio.to_thread(
+                self.api.list_statefulsets, self.target, "is_ioc==true"
+            )
+            found = [sts["metadata"]["name"] for sts in sts_list["items"]]
+        else:
+            names = await shell.run_command(
+                f'kubectl get statefulset -l "is_ioc==true" -n {self.target} -o name',
+            )
+            found = [
+                name.removeprefix("statefulset.apps/")
+                for name in names.split()
+                if name.startswith("statefulset.apps/")
+            ]
+        missing = [name for name in service_names if name not in found]
+        if missing:
+            raise CommandError(
+                f"Services not found in {self.target}: {', '.join(missing)}"
+            )
+
     async def _validate_target(self):
         """
         Verify we have a good namespace that exists in the cluster
         """
         cmd = f"kubectl get namespace {self._target}"
         try:
-            await shell.run_command(cmd, error_OK=False)
+            if self.api is not None:
+                await asyncio.to_thread(self.api.get_namespace, self._target)
+            else:
+                await shell.run_command(cmd, error_OK=False)
         except ShellError as e:
             if "NotFound" in str(e):
                 raise CommandError(f"Namespace '{self._target}' not found") from e
@@ -0,0 +1,201 @@
+"""
+An informer keeping a live table of the services in a K8s namespace
+
+One list of the statefulsets is followed by a watch that applies each change
+event to an in-memory cache, so readers such as the monitor query the cache
+instead of the API server. The watch resumes from the last resourceVersion,
+relists when that version has expired and relists periodically regardless.
+"""
+
+import asyncio
+import json
+import threading
+from collections.abc import Awaitable, Callable
+from concurrent.futures import Future
+from contextlib import aclosing
+from urllib.parse import urlencode
+
+import polars
+
+from edge_containers_cli import globals
+from edge_containers_cli.cmds.k8s_services import (
+    STS_SCHEMA,
+    services_frame,
+    sts_frame,
+)
+from edge_containers_cli.logging import log
+from edge_containers_cli.shell import ShellError, shell
+from edge_containers_cli.utils import _submit_async
+
+IOC_SELECTOR = "is_ioc==true"
+
+
+class WatchExpiredError(Exception):
+    pass
+
+
+class StatefulSetInformer:
+    """
+    Caches the IOC statefulsets of a namespace, kept current by a watch
+    running on the shared event loop
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        fetch_versions: Callable[[], Awaitable[polars.DataFrame]],
+        resync: float = globals.INFORMER_RESYNC,
+    ) -> None:
+        """
+        args:
+            namespace: the namespace to watch
+            fetch_versions: coroutine function returning the name and
+                version of each helm release in the namespace
+            resync: seconds between full relists
+        """
+        self.namespace = namespace
+        self.resync = resync
+        self.resource_version = ""
+        self._fetch_versions = fetch_versions
+        self._items: dict[str, dict] = {}
+        self._versions = polars.DataFrame(
+            schema=polars.Schema({"name": polars.String, "version": polars.String})
+        )
+        self._versions_stale = asyncio.Event()
+        self._lock = threading.Lock()
+        self._synced = threading.Event()
+        self._future: Future | None = None
+
+    @property
+    def synced(self) -> bool:
+        """True while the cache reflects the cluster"""
+        return self._synced.is_set()
+
+    def _api_path(self, **params: str) -> str:
+        query = urlencode({"labelSelector": IOC_SELECTOR, **params})
+        return f"/apis/apps/v1/namespaces/{self.namespace}/statefulsets?{query}"
+
+    def start(self) -> None:
+        if self._future is None:
+            self._future = _submit_async(self.run())
+
+    def stop(self) -> None:
+        if self._future is not None:
+            self._future.cancel()
+            self._future = None
+        self._synced.clear()
+
+    async def run(self) -> None:
+        try:
+            async with asyncio.TaskGroup() as group:
+                group.create_task(self._refresh_versions())
+                group.create_task(self._list_and_watch())
+        except Exception:
+            log.exception(f"Informer for {self.namespace} stopped")
+            raise
+        finally:
+            # Readers list for themselves once the cache is no longer kept
+            self._synced.clear()
+
+    async def _list_and_watch(self) -> None:
+        while True:
+            try:
+                await self.list()
+                await asyncio.wait_for(self.watch(), self.resync)
+            except TimeoutError:
+                log.debug(f"Resyncing services in {self.namespace}")
+            except WatchExpiredError:
+                log.debug(f"Watch of {self.namespace} expired, relisting")
+            except ShellError as e:
+                # Readers fall back to listing for themselves until we recover
+                self._synced.clear()
+                log.warning(f"Watch of {self.namespace} failed: {e}")
+                await asyncio.sleep(globals.INFORMER_RETRY)
+            except Exception as e:
+                # Such as a truncated watch line, relist rather than stop
+                self._synced.clear()
+                log.warning(f"Watch of {self.namespace} failed: {e!r}")
+                await asyncio.sleep(globals.INFORMER_RETRY)
+
+    async def list(self) -> None:
+        """
+        Replace the cache with a full listing
+        """
+        response = await shell.run_command(f"kubectl get --raw '{self._api_path()}'")
+        sts_list = json.loads(response)
+        sts_df = sts_frame(sts_list["items"])
+        with self._lock:
+            self._items = {row["name"]: row for row in sts_df.iter_rows(named=True)}
+            self.resource_version = sts_list["metadata"]["resourceVersion"]
+        self._versions_stale.set()
+        self._synced.set()
+
+    async def watch(self) -> None:
+        """
+        Apply watch events from the current resourceVersion, reconnecting
+        each time the server closes the watch
+        """
+        while True:
+            path = self._api_path(
+                watch="true",
+                allowWatchBookmarks="true",
+                resourceVersion=self.resource_version,
+            )
+            command = f"kubectl get --raw '{path}'"
+            # Closing the stream kills kubectl when an event ends the watch
+            async with aclosing(shell.run_command_lines(command)) as lines:
+                async for line in lines:
+                    if line.strip():
+                        self.apply(json.loads(line))
+
+    def apply(self, event: dict) -> None:
+        """
+        Apply a single watch event to the cache
+        """
+        event_type, sts = event["type"], event["object"]
+        if event_type == "ERROR":
+            # A Status object, 410 Gone when our resourceVersion is too old
+            if sts.get("code") == 410:
+                raise WatchExpiredError(sts.get("message", ""))
+            raise ShellError(sts.get("message", str(sts)))
+
+        with self._lock:
+            if event_type in ("ADDED", "MODIFIED"):
+                self._items[sts["metadata"]["name"]] = sts_frame([sts]).row(
+                    0, named=True
+                )
+            elif event_type == "DELETED":
+                self._items.pop(sts["metadata"]["name"], None)
+            self.resource_version = sts["metadata"]["resourceVersion"]
+        if event_type != "BOOKMARK":
+            # A helm upgrade modifies the statefulset so may bring a new version
+            self._versions_stale.set()
+
+    async def refresh_versions(self) -> None:
+        versions = await self._fetch_versions()
+        with self._lock:
+            self._versions = versions.select(["name", "version"])
+
+    async def _refresh_versions(self) -> None:
+        while True:
+            await self._versions_stale.wait()
+            self._versions_stale.clear()
+            try:
+                await self.refresh_versions()
+            except ShellError as e:
+                log.warning(f"Listing helm releases in {self.namespace} failed: {e}")
+                await asyncio.sleep(globals.INFORMER_RETRY)
+                self._versions_stale.set()
+
+    def __contains__(self, service_name: str) -> bool:
+        with self._lock:
+            return service_name in self._items
+
+    def services_df(self) -> polars.DataFrame:
+        """
+        The cached services in the same form as a fresh listing
+        """
+        with self._lock:
+            sts_df = polars.DataFrame(list(self._items.values()), schema=STS_SCHEMA)
+            versions = self._versions
+        return services_frame(sts_df, versions)
@@ -0,0 +1,87 @@
+"""
+Tables of the IOC statefulsets in a namespace, shared by K8sCommands and
+its informer
+"""
+
+from io import StringIO
+
+import polars
+
+from edge_containers_cli.cmds.commands import derive_services
+
+# The statefulset fields read by ps, in column order
+STS_COLUMNS = {
+    "name": ".metadata.name",
+    "label": ".metadata.labels.description",
+    "deployed": ".metadata.creationTimestamp",
+    "ready": ".status.readyReplicas",
+}
+# One tab separated line per statefulset, missing fields are left empty
+STS_JSONPATH = (
+    "{range .items[*]}"
+    + '{"\\t"}'.join(f"{{{field}}}" for field in STS_COLUMNS.values())
+    + '{"\\n"}{end}'
+)
+STS_SCHEMA = polars.Schema(dict.fromkeys(STS_COLUMNS, polars.String))
+
+# The same fields of whole statefulset objects, any others are dropped on load
+STS_OBJECT_SCHEMA = polars.Schema(
+    {
+        "metadata": polars.Struct(
+            {
+                "name": polars.String,
+                "creationTimestamp": polars.String,
+                "labels": polars.Struct({"description": polars.String}),
+            }
+        ),
+        "status": polars.Struct({"readyReplicas": polars.Int64}),
+    }
+)
+
+
+def read_sts_table(sts_table: str) -> polars.DataFrame:
+    """
+    Read the STS_JSONPATH output of kubectl into STS_SCHEMA columns
+    """
+    if not sts_table.strip():
+        return polars.DataFrame(schema=STS_SCHEMA)
+    return polars.read_csv(
+        StringIO(sts_table),
+        separator="\t",
+        has_header=False,
+        schema=STS_SCHEMA,
+        quote_char=None,
+    )
+
+
+def sts_frame(items: list[dict]) -> polars.DataFrame:
+    """
+    Load statefulset objects, as returned by the API, into STS_SCHEMA columns
+    """
+    metadata = polars.col("metadata")
+    return polars.DataFrame(items, schema=STS_OBJECT_SCHEMA).select(
+        metadata.struct.field("name"),
+        metadata.struct.field("labels").struct.field("description").alias("label"),
+        metadata.struct.field("creationTimestamp").alias("deployed"),
+        polars.col("status")
+        .struct.field("readyReplicas")
+        .cast(polars.String)
+        .alias("ready"),
+    )
+
+
+def services_frame(
+    sts_df: polars.DataFrame, versions_df: polars.DataFrame
+) -> polars.DataFrame:
+    """
+    Join the helm release versions to STS_SCHEMA columns and derive the
+    services table
+    """
+    return derive_services(
+        sts_df.join(
+            versions_df.select(["name", "version"]),
+            on="name",
+            how="left",
+            coalesce=True,
+        )
+    )
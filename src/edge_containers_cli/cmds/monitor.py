@@ -35,11 +35,12 @@ from textual.widgets import (
 from textual.widgets.data_table import RowKey
 from textual.worker import get_current_worker
 
+from edge_containers_cli import globals
 from edge_containers_cli.cmds.commands import CommandError, Commands
 from edge_containers_cli.definitions import ECLogLevels, Emoji
 from edge_containers_cli.git import GitError
 from edge_containers_cli.logging import log
-from edge_containers_cli.shell import ShellError
+from edge_containers_cli.shell import ShellError, ShellTimeoutError
 from edge_containers_cli.utils import _AsyncFuncType, _run_async
 
 WHITE = Color.parse("white")
@@ -125,6 +126,8 @@ class LogsScreen(ModalScreen, inherit_bindings=False):
         self.service_name = service_name
         self.auto_scroll = False
         self._polling_rate_hz = 1
+        self._cursor: str | None = None
+        self._line_count = 0
 
     def compose(self) -> ComposeResult:
         yield Header(show_clock=True)
@@ -140,27 +143,46 @@ class LogsScreen(ModalScreen, inherit_bindings=False):
         worker = get_current_worker()
 
         while not worker.is_cancelled:
-            result = _run_async(
-                self.fetch_log(
-                    self.service_name,
-                    **{"prev": False},
+            try:
+                result, cursor = _run_async(
+                    self.fetch_log(
+                        self.service_name,
+                        self._cursor,
+                        tail=globals.LOGS_TAIL,
+                    )
                 )
-            )
-            self.app.call_from_thread(partial(self.update_logs, result))
+            except ShellTimeoutError as e:
+                log.warning(e)
+            else:
+                # Lines after a cursor are new, otherwise the log is whole
+                replace = self._cursor is None or cursor is None
+                self._cursor = cursor
+                self.app.call_from_thread(partial(self.update_logs, result, replace))
             time.sleep(1 / self._polling_rate_hz)
 
-    def update_logs(self, log_text):
+    def update_logs(self, log_text, replace=True):
         log = self.query_one(RichLog)
         curr_x = log.scroll_x
         curr_y = log.scroll_y
-        log.clear()
+        if replace:
+            log.clear()
+            self._line_count = 0
+        elif not log_text:
+            return
+        log_text = log_text.rstrip("\n")
         log.write(
-            Syntax(log_text, "bash", line_numbers=True),
+            Syntax(
+                log_text,
+                "bash",
+                line_numbers=True,
+                start_line=self._line_count + 1,
+            ),
             width=80,
             expand=True,
             shrink=False,
             scroll_end=False,
         )
+        self._line_count += len(log_text.splitlines())
         if self.auto_scroll:
             log.scroll_end(animate=False)
         else:
@@ -338,8 +360,12 @@ class IocTable(Widget):
         worker = get_current_worker()
 
         while not worker.is_cancelled:
-            result = self._get_services_df(self.running_only)
-            self.app.call_from_thread(partial(self.populate_table, result))
+            try:
+                result = self._get_services_df(self.running_only)
+            except ShellTimeoutError as e:
+                log.warning(e)
+            else:
+                self.app.call_from_thread(partial(self.populate_table, result))
             time.sleep(1 / self._polling_rate_hz)
 
     def _get_services_df(self, running_only):
@@ -502,8 +528,12 @@ class MonitorApp(App):
 
     def on_mount(self) -> None:
         self.title = f"{self.beamline} Services Monitor"
+        self.commands._start_watch()  # noqa: SLF001
         self.do_work()
 
+    def on_unmount(self) -> None:
+        self.commands._stop_watch()  # noqa: SLF001
+
     @work(exclusive=True, thread=True)
     def do_work(self):
         worker = get_current_worker()
@@ -551,7 +581,7 @@ class MonitorApp(App):
                         table.update_indicator_threadsafe(
                             service_name, Emoji.road_works
                         )
-                        _run_async(command(service_name))
+                        _run_async(command([service_name]))
                     finally:
                         table.update_indicator_threadsafe(service_name, Emoji.none)
                         self.busy_services.remove(service_name)
@@ -598,7 +628,7 @@ class MonitorApp(App):
             ready = self._get_highlighted_cell("ready") == Emoji.check_mark
 
             if ready:
-                command = self.commands._get_logs  # noqa: SLF001
+                command = self.commands._get_new_logs  # noqa: SLF001
                 self.push_screen(LogsScreen(command, service_name))
             else:
                 log.info(f"Ignore request for logs - {service_name} not ready")
@@ -8,6 +8,11 @@ class ECBackends(str, Enum):
     DEMO = "DEMO"
 
 
+class ECTransports(str, Enum):
+    CLI = "CLI"
+    API = "API"
+
+
 class ECLogLevels(str, Enum):
     DEBUG = "DEBUG"
     INFO = "INFO"
@@ -26,6 +31,12 @@ class ENV(str, Enum):
     debug = "EC_DEBUG"
     log_level = "EC_LOG_LEVEL"
     log_url = "EC_LOG_URL"
+    timeout = "EC_TIMEOUT"
+    trace = "EC_TRACE"
+    record = "EC_RECORD"
+    replay = "EC_REPLAY"
+    replay_latency = "EC_REPLAY_LATENCY"
+    transport = "EC_TRANSPORT"
 
 
 @dataclass
@@ -33,6 +44,7 @@ class ECContext:
     repo: str = ""
     target: str = ""
     log_url: str = ""
+    transport: ECTransports = ECTransports.CLI
 
 
 class Emoji(str, Enum):
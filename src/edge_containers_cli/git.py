@@ -34,23 +34,42 @@ async def set_value(
     """
     sets a key,value pair in a yaml file and push the changes
     """
+    await set_values(repo_url, file, {key: value})
+
+
+async def set_values(
+    repo_url: str,
+    file: Path,
+    values: dict[str, YamlTypes],
+) -> None:
+    """
+    sets several key,value pairs in a yaml file and push the changes as one
+    commit
+    """
     with new_workdir() as path:
         try:
             await shell.run_command(f"git clone --depth=1 {repo_url} {path}")
             with chdir(path):  # From python 3.11 can use contextlib.chdir(working_dir)
                 file_data = YamlFile(file)
-                try:
-                    value_repo = file_data.get_key(key)
-                    if value_repo == value:
-                        log.debug(f"{key} already set as {value}")
-                        return None
-                except YamlFileError:
-                    pass
-
-                file_data.set_key(key, value)
+                changes = {}
+                for key, value in values.items():
+                    try:
+                        value_repo = file_data.get_key(key)
+                        if value_repo == value:
+                            log.debug(f"{key} already set as {value}")
+                            continue
+                    except YamlFileError:
+                        pass
+                    changes[key] = value
+                if not changes:
+                    return None
+
+                for key, value in changes.items():
+                    file_data.set_key(key, value)
                 file_data.dump_file()
 
-                commit_msg = f"Set {key}={value} in {file}"
+                settings = ", ".join(f"{key}={value}" for key, value in changes.items())
+                commit_msg = f"Set {settings} in {file}"
                 await shell.run_command("git add .")
                 await shell.run_command(f'git commit -m "{commit_msg}"')
                 await shell.run_command("git push", skip_on_dryrun=True)
@@ -18,3 +18,21 @@ SERVICES_DIR = "services"
 SHARED_VALUES = "services/values.yaml"
 # Time formatting
 TIME_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+# Default command timeout in seconds for the monitor's pollers
+MONITOR_TIMEOUT = 30
+# Command output beyond this many bytes is spooled to a temporary file
+SPOOL_THRESHOLD = 8 * 1024 * 1024
+# Characters of command output included in debug logs
+LOG_OUTPUT_LIMIT = 2000
+# Seconds between full relists of the services watched by the monitor
+INFORMER_RESYNC = 300
+# Seconds to wait before relisting after a failed watch
+INFORMER_RETRY = 5
+# Connections kept open to the API server by the K8S API transport
+API_POOL_SIZE = 10
+# Lines of log fetched when the monitor first shows a service's logs
+LOGS_TAIL = 5000
+# Targets queried at once by ps with several targets
+PS_CONCURRENCY = 8
+# Seconds that deploy, start and stop with --wait wait for services to settle
+WAIT_TIMEOUT = 300
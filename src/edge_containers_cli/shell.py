@@ -3,22 +3,131 @@ functions for executing commands and querying environment in the linux shell
 """
 
 import asyncio
+import codecs
+import os
+import signal
+import tempfile
+import threading
+import time
+from collections.abc import AsyncIterator, Iterator
+from pathlib import Path
+from typing import TextIO
 
 from rich.console import Console
 from rich.style import Style
 
+from . import globals
+from .cassette import Cassette, Interaction
 from .logging import log
+from .tracing import CommandRecord, ShellTracer, find_caller
 
 
 class ShellError(Exception):
     pass
 
 
+class ShellTimeoutError(ShellError):
+    pass
+
+
+_CHUNK_SIZE = 64 * 1024
+
+
+def _truncate(text: str, limit: int = globals.LOG_OUTPUT_LIMIT) -> str:
+    """
+    shorten command output for the debug log
+    """
+    if len(text) <= limit:
+        return text
+    return f"{text[:limit]}... [{len(text) - limit} more characters]"
+
+
+class SpooledOutput:
+    """
+    Command output kept in memory up to a threshold and in a temporary file
+    beyond it, decoded only when read
+    """
+
+    def __init__(self, max_size: int = globals.SPOOL_THRESHOLD) -> None:
+        self._file = tempfile.SpooledTemporaryFile(max_size=max_size)
+        self.size = 0
+
+    def write(self, data: bytes) -> None:
+        self._file.write(data)
+        self.size += len(data)
+
+    def text(self) -> str:
+        self._file.seek(0)
+        return self._file.read().decode()
+
+    def lines(self) -> Iterator[str]:
+        self._file.seek(0)
+        for line in self._file:
+            yield line.decode()
+
+    def copy_to(self, stream: TextIO) -> None:
+        """
+        write the output to a text stream a chunk at a time
+        """
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._file.seek(0)
+        while chunk := self._file.read(_CHUNK_SIZE):
+            stream.write(decoder.decode(chunk))
+        stream.write(decoder.decode(b"", final=True))
+
+    def close(self) -> None:
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __str__(self) -> str:
+        return self.text()
+
+
+def _kill_process_group(process: asyncio.subprocess.Process) -> None:
+    """
+    kill a child, along with anything it spawned when it was started in its
+    own session
+    """
+    try:
+        if os.getpgid(process.pid) == process.pid:
+            os.killpg(process.pid, signal.SIGKILL)
+        else:
+            process.kill()
+    except ProcessLookupError:
+        pass
+
+
+async def _drain(
+    process: asyncio.subprocess.Process, spool: SpooledOutput
+) -> tuple[bytes, bytes]:
+    """
+    communicate() for a process whose stdout goes to a spool
+    """
+    assert process.stdout is not None and process.stderr is not None
+
+    async def copy_stdout():
+        while chunk := await process.stdout.read(_CHUNK_SIZE):  # type: ignore
+            spool.write(chunk)
+
+    _, stderr = await asyncio.gather(copy_stdout(), process.stderr.read())
+    await process.wait()
+    return b"", stderr
+
+
 class ECShell:
     def __init__(self) -> None:
         self.console = Console(highlight=False, soft_wrap=True)
         self.verbose = False
         self.dry_run = False
+        self.timeout: float | None = None
+        self.tracer: ShellTracer | None = None
+        self.cassette: Cassette | None = None
+        self.spool_threshold = globals.SPOOL_THRESHOLD
 
     def echo_command(self, command: str):
         """
@@ -44,6 +153,7 @@ class ECShell:
         error_OK=False,
         show=False,
         skip_on_dryrun=False,
+        timeout: float | None = None,
     ) -> str:
         """
         Run a command and return the output
@@ -52,6 +162,8 @@ class ECShell:
             command: the command to run
             error_OK: if True then do not raise an exception on failure
             show: print the command output to the console
+            timeout: seconds before the command is killed, defaults to
+                the shell timeout
         """
         if self.dry_run:
             self.echo_command(f"(skipped) {command}" if skip_on_dryrun else command)
@@ -59,20 +171,16 @@ class ECShell:
             self.echo_command(command)
 
         if not (self.dry_run and skip_on_dryrun):
-            p_result = await asyncio.create_subprocess_shell(
-                command,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
-            )
-            log.debug(f"running: {command}")
-
-            stdout, stderr = await p_result.communicate()
+            if self.cassette is not None and self.cassette.replay:
+                interaction = await self._replay(command)
+                returncode, result = interaction.rc, str(interaction.rsp)
+                error_out = interaction.err
+                output = result.removesuffix(error_out)
+            else:
+                returncode, output, error_out = await self._execute(command, timeout)
+                result = output + error_out
 
-            output = stdout.decode()
-            error_out = stderr.decode()
-            result = output + error_out
-
-            if p_result.returncode != 0 and not error_OK:
+            if returncode != 0 and not error_OK:
                 if self.verbose:
                     self.echo_error("\nCommand Failed:")
                     self.echo_command(command)
@@ -82,12 +190,212 @@ class ECShell:
                 self.echo_output(output)
                 self.echo_error(error_out)
 
-            log.debug(f"returning: {result}")
+            log.debug(f"returning: {_truncate(result)}")
         else:
             log.debug(f"Dry run - skipping: {command}")
             result = ""
         return result
 
+    async def run_command_spooled(
+        self,
+        command: str,
+        error_OK=False,
+        timeout: float | None = None,
+    ) -> SpooledOutput:
+        """
+        Run a command returning its output as a SpooledOutput, for commands
+        such as log fetches whose output may be too large to hold in memory
+
+        args:
+            command: the command to run
+            error_OK: if True then do not raise an exception on failure
+            timeout: seconds before the command is killed, defaults to
+                the shell timeout
+        """
+        if self.dry_run or self.verbose:
+            self.echo_command(command)
+
+        spooled = SpooledOutput(self.spool_threshold)
+        if self.cassette is not None and self.cassette.replay:
+            interaction = await self._replay(command)
+            returncode, error_out = interaction.rc, interaction.err
+            spooled.write(str(interaction.rsp).encode())
+        else:
+            returncode, _, error_out = await self._execute(command, timeout, spooled)
+            spooled.write(error_out.encode())
+
+        if returncode != 0 and not error_OK:
+            spooled.close()
+            if self.verbose:
+                self.echo_error("\nCommand Failed:")
+                self.echo_command(command)
+            raise ShellError(error_out)
+
+        log.debug(f"returning: {spooled.size} bytes")
+        return spooled
+
+    async def run_command_lines(self, command: str) -> AsyncIterator[str]:
+        """
+        Run a long lived command such as a watch, yielding each line of its
+        output as it arrives. The shell timeout does not apply and the
+        command is killed when the caller stops iterating. Streams are not
+        recorded to a cassette, but a response in a replayed cassette is
+        served line by line.
+
+        args:
+            command: the command to run
+        """
+        if self.dry_run or self.verbose:
+            self.echo_command(command)
+
+        if self.cassette is not None and self.cassette.replay:
+            interaction = await self._replay(command)
+            if interaction.rc != 0:
+                raise ShellError(interaction.err)
+            output = str(interaction.rsp).removesuffix(interaction.err)
+            for line in output.splitlines(keepends=True):
+                yield line
+            return
+
+        start = time.time()
+        process = await asyncio.create_subprocess_shell(
+            command,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            start_new_session=True,
+            limit=self.spool_threshold,
+        )
+        log.debug(f"streaming: {command}")
+        assert process.stdout is not None and process.stderr is not None
+
+        stderr = asyncio.ensure_future(process.stderr.read())
+        received = 0
+        try:
+            while line := await process.stdout.readline():
+                received += len(line)
+                yield line.decode()
+            error_out = (await stderr).decode()
+            await process.wait()
+        finally:
+            if process.returncode is None:
+                _kill_process_group(process)
+                stderr.cancel()
+                await process.wait()
+            self._trace(command, start, process.returncode, received)
+
+        if process.returncode != 0:
+            raise ShellError(error_out)
+
+    async def _execute(
+        self, command: str, timeout: float | None, spool: SpooledOutput | None = None
+    ) -> tuple[int | None, str, str]:
+        """
+        Run a command returning exit code, stdout and stderr. When a spool is
+        given stdout is written to it instead of returned.
+
+        A command that may time out runs in its own session so that the
+        timeout can kill everything it started. Others keep the controlling
+        terminal, which git and ssh need to prompt for credentials.
+        """
+        start = time.time()
+        timeout = self.timeout if timeout is None else timeout
+        p_result = await asyncio.create_subprocess_shell(
+            command,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            start_new_session=timeout is not None,
+        )
+        log.debug(f"running: {command}")
+
+        stdout, stderr = b"", b""
+        try:
+            stdout, stderr = await self._communicate(p_result, command, timeout, spool)
+        finally:
+            spooled_size = spool.size if spool else 0
+            self._trace(
+                command,
+                start,
+                p_result.returncode,
+                len(stdout) + len(stderr) + spooled_size,
+            )
+
+        output = stdout.decode()
+        error_out = stderr.decode()
+        if self.cassette is not None:
+            self.cassette.record(
+                Interaction(
+                    cmd=command,
+                    rsp=(spool.text() if spool else output) + error_out,
+                    err=error_out,
+                    rc=p_result.returncode or 0,
+                    duration=time.time() - start,
+                )
+            )
+        return p_result.returncode, output, error_out
+
+    async def _replay(self, command: str) -> Interaction:
+        """
+        Serve a command from the cassette, waiting for the scaled latency
+        """
+        assert self.cassette is not None
+        start = time.time()
+        interaction = self.cassette.play(command)
+        if interaction is None:
+            raise ShellError(f"No recorded response for: {command}")
+        if self.cassette.latency:
+            await asyncio.sleep(interaction.duration * self.cassette.latency)
+        log.debug(f"replaying: {command}")
+        self._trace(command, start, interaction.rc, len(str(interaction.rsp)))
+        return interaction
+
+    def _trace(
+        self, command: str, start: float, returncode: int | None, output_bytes: int
+    ) -> None:
+        """
+        Hand the timing of a finished command to the tracer when enabled
+        """
+        if self.tracer is not None:
+            self.tracer.add(
+                CommandRecord(
+                    command=command,
+                    caller=find_caller(),
+                    start=start,
+                    duration=time.time() - start,
+                    returncode=returncode,
+                    output_bytes=output_bytes,
+                    thread=threading.get_ident(),
+                )
+            )
+
+    async def _communicate(
+        self,
+        process: asyncio.subprocess.Process,
+        command: str,
+        timeout: float | None,
+        spool: SpooledOutput | None = None,
+    ) -> tuple[bytes, bytes]:
+        """
+        Wait for a command to complete, killing its process group on timeout
+        """
+        timeout = self.timeout if timeout is None else timeout
+        try:
+            if spool is None:
+                return await asyncio.wait_for(process.communicate(), timeout)
+            return await asyncio.wait_for(_drain(process, spool), timeout)
+        except TimeoutError:
+            _kill_process_group(process)
+            await process.wait()
+            if self.verbose:
+                self.echo_error("\nCommand Timed Out:")
+                self.echo_command(command)
+            raise ShellTimeoutError(
+                f"Command timed out after {timeout}s: {command}"
+            ) from None
+        except asyncio.CancelledError:
+            # Children in their own session would otherwise outlive us
+            _kill_process_group(process)
+            raise
+
     async def run_interactive(
         self,
         command: str,
@@ -107,20 +415,38 @@ class ECShell:
             self.echo_command(command)
 
         if not (self.dry_run and skip_on_dryrun):
-            p_result = await asyncio.create_subprocess_shell(
-                command, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
-            )
-            log.debug(f"running: {command}")
+            if self.cassette is not None and self.cassette.replay:
+                returncode = (await self._replay(command)).rc
+            else:
+                start = time.time()
+                p_result = await asyncio.create_subprocess_shell(
+                    command,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE,
+                )
+                log.debug(f"running: {command}")
 
-            stdout, stderr = await p_result.communicate()
+                stdout, stderr = await p_result.communicate()
+                returncode = p_result.returncode
+                self._trace(command, start, returncode, len(stdout) + len(stderr))
+                if self.cassette is not None:
+                    self.cassette.record(
+                        Interaction(
+                            cmd=command,
+                            rsp=returncode == 0,
+                            err=stderr.decode(),
+                            rc=returncode or 0,
+                            duration=time.time() - start,
+                        )
+                    )
 
-            if p_result.returncode != 0 and not error_OK:
+            if returncode != 0 and not error_OK:
                 if self.verbose:
                     self.echo_error("\nCommand Failed:")
                     self.echo_command(command)
                 raise ShellError(f"Command:{command} failed")
 
-            result = p_result.returncode == 0
+            result = returncode == 0
             log.debug(f"returning: {result}")
         else:
             log.info(f"Dry run - skipping: {command}")
@@ -132,6 +458,25 @@ class ECShell:
 shell = ECShell()
 
 
-def init_shell(verbose: bool, dry_run: bool) -> None:
+def init_shell(verbose: bool, dry_run: bool, timeout: float | None = None) -> None:
     shell.verbose = verbose
     shell.dry_run = dry_run
+    shell.timeout = timeout
+    shell.tracer = None
+
+
+def init_cassette(
+    record: Path | None, replay: Path | None, latency: float = 0.0
+) -> Cassette | None:
+    if replay:
+        shell.cassette = Cassette(replay, replay=True, latency=latency)
+    elif record:
+        shell.cassette = Cassette(record)
+    else:
+        shell.cassette = None
+    return shell.cassette
+
+
+def init_tracer() -> ShellTracer:
+    shell.tracer = ShellTracer()
+    return shell.tracer
@@ -0,0 +1,151 @@
+"""
+Record timings for every command executed by the shell
+"""
+
+import inspect
+import json
+import math
+import os
+import threading
+from dataclasses import dataclass
+
+from rich import box
+from rich.console import Console
+from rich.table import Table
+
+# Frames from these modules are plumbing and never the interesting caller
+_SKIP_MODULES = (
+    "asyncio",
+    "concurrent",
+    "threading",
+    "edge_containers_cli.shell",
+    "edge_containers_cli.api",
+)
+
+
+@dataclass
+class CommandRecord:
+    command: str
+    caller: str
+    start: float  # seconds since the epoch
+    duration: float  # seconds
+    returncode: int | None
+    output_bytes: int
+    thread: int
+
+    @property
+    def executable(self) -> str:
+        words = self.command.split(maxsplit=1)
+        return os.path.basename(words[0]) if words else ""
+
+
+def find_caller() -> str:
+    """
+    Walk the stack for the Commands method that caused a command to run,
+    falling back to the nearest function outside the shell
+    """
+    frame = inspect.currentframe()
+    nearest = ""
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "")
+        if module != __name__ and not module.startswith(_SKIP_MODULES):
+            qualname = frame.f_code.co_qualname
+            if "Commands." in qualname:
+                return qualname
+            nearest = nearest or qualname
+        frame = frame.f_back
+    return nearest
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    """
+    Nearest-rank percentile of a list of values
+    """
+    ordered = sorted(values)
+    rank = max(math.ceil(fraction * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+class ShellTracer:
+    """
+    Collects a CommandRecord for every command run, safe to share between
+    the monitor's worker threads
+    """
+
+    def __init__(self) -> None:
+        self.records: list[CommandRecord] = []
+        self._lock = threading.Lock()
+
+    def add(self, record: CommandRecord) -> None:
+        with self._lock:
+            self.records.append(record)
+
+    def chrome_trace(self) -> dict:
+        """
+        Render the records in the Chrome trace event format read by
+        chrome://tracing and https://ui.perfetto.dev
+        """
+        pid = os.getpid()
+        events = [
+            {
+                "name": record.executable,
+                "cat": record.caller,
+                "ph": "X",
+                "ts": record.start * 1e6,
+                "dur": record.duration * 1e6,
+                "pid": pid,
+                "tid": record.thread,
+                "args": {
+                    "command": record.command,
+                    "caller": record.caller,
+                    "returncode": record.returncode,
+                    "output_bytes": record.output_bytes,
+                },
+            }
+            for record in self.records
+        ]
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def summary(self) -> Table:
+        """
+        Tabulate count and latency percentiles per executable
+        """
+        durations: dict[str, list[float]] = {}
+        for record in self.records:
+            durations.setdefault(record.executable, []).append(record.duration)
+
+        table = Table(
+            "executable",
+            "count",
+            "total (s)",
+            "p50 (s)",
+            "p95 (s)",
+            "max (s)",
+            show_header=True,
+            header_style="bold cyan",
+            box=box.ROUNDED,
+        )
+        for executable, times in sorted(durations.items()):
+            table.add_row(
+                executable,
+                str(len(times)),
+                f"{sum(times):.3f}",
+                f"{percentile(times, 0.5):.3f}",
+                f"{percentile(times, 0.95):.3f}",
+                f"{max(times):.3f}",
+            )
+        return table
+
+    def dump(self, destination: str) -> None:
+        """
+        Write a Chrome trace for a .json destination, '-' prints the summary
+        table to stderr and any other file receives the summary as text
+        """
+        if destination == "-":
+            Console(stderr=True).print(self.summary())
+        elif destination.endswith(".json"):
+            with open(destination, "w") as f:
+                json.dump(self.chrome_trace(), f)
+        else:
+            with open(destination, "w") as f:
+                Console(file=f, width=120).print(self.summary())
@@ -3,15 +3,19 @@ utility functions
 """
 
 import asyncio
+import concurrent.futures
 import contextlib
 import functools
 import gc
 import json
 import os
+import random
 import shutil
 import tempfile
+import threading
 import time
 from collections.abc import Callable, Coroutine
+from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
 from typing import Any, Union
@@ -228,20 +232,64 @@ def is_partial_match(query: str, target_list: list[str]) -> bool:
     return False
 
 
-def _run_async(coroutine: Coroutine):
-    try:
-        asyncio.get_running_loop()
-        # We're in an async context — run in a separate thread with its own loop
-        import concurrent.futures
+class _LoopThread:
+    """
+    A long lived event loop in a daemon thread shared by every synchronous
+    caller that needs to run a coroutine, so that polling does not pay for
+    a new loop (and thread) on each call
+    """
+
+    def __init__(self) -> None:
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(
+                    target=self._loop.run_forever, name="ec-event-loop", daemon=True
+                )
+                self._thread.start()
+        return self._loop
+
+    def in_loop_thread(self) -> bool:
+        return threading.current_thread() is self._thread
+
+    def submit(self, coroutine: Coroutine) -> concurrent.futures.Future:
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+
+
+_loop_thread = _LoopThread()
+
+
+def _submit_async(coroutine: Coroutine) -> concurrent.futures.Future:
+    """
+    Schedule *coroutine* on the shared event loop from any thread
+    """
+    return _loop_thread.submit(coroutine)
 
-        with concurrent.futures.ThreadPoolExecutor() as pool:
-            future = pool.submit(_run_on_new_loop, coroutine)
-            ret = future.result()  # blocks the worker thread, not the event loop thread
-    except RuntimeError:
-        # No running loop — safe to block here
-        ret = _run_on_new_loop(coroutine)
 
-    return ret
+def _run_async(coroutine: Coroutine):
+    """
+    Run *coroutine* to completion from synchronous code, on the shared
+    event loop
+    """
+    if _loop_thread.in_loop_thread():
+        # Blocking the shared loop on itself would deadlock, so fall back to a
+        # private loop in a worker thread
+        with concurrent.futures.ThreadPoolExecutor(max_workers=1) as pool:
+            return pool.submit(_run_on_new_loop, coroutine).result()
+
+    future = _submit_async(coroutine)
+    try:
+        return future.result()
+    except BaseException:
+        # e.g. KeyboardInterrupt, don't leave the coroutine running
+        future.cancel()
+        raise
 
 
 def _run_on_new_loop(coroutine: Coroutine):
@@ -274,6 +322,52 @@ def _run_on_new_loop(coroutine: Coroutine):
             loop.close()
 
 
+@dataclass(frozen=True)
+class RetryPolicy:
+    """
+    How to retry an async call that fails with a transient error
+
+    Waits grow by backoff from delay up to max_delay, each varied by up to
+    jitter of itself so that clients failing together do not retry together.
+    Retrying stops after attempts calls or once the next wait would pass
+    budget seconds from the first call.
+    """
+
+    attempts: int = 5
+    delay: float = 1.0
+    backoff: float = 2.0
+    max_delay: float = 30.0
+    jitter: float = 0.5
+    budget: float = 60.0
+    retry_on: tuple[type[Exception], ...] = (Exception,)
+    transient: Callable[[Exception], bool] = lambda error: True
+
+    def wait(self, attempt: int) -> float:
+        """
+        Seconds to wait after the given failed attempt, counting from 1
+        """
+        wait = min(self.delay * self.backoff ** (attempt - 1), self.max_delay)
+        return wait * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    async def run(self, func: _AsyncFuncType, *args, **kwargs):
+        deadline = time.monotonic() + self.budget
+        attempt = 1
+        while True:
+            try:
+                return await func(*args, **kwargs)
+            except self.retry_on as e:
+                if not self.transient(e):
+                    raise
+                wait = self.wait(attempt)
+                if attempt >= self.attempts or time.monotonic() + wait > deadline:
+                    log.debug(f"Retry failed after {attempt} attempts")
+                    raise
+                log.debug(f"Retry attempt {attempt} failed. Retrying in {wait:.1f}s")
+                # Sleep without blocking the loop so other tasks carry on
+                await asyncio.sleep(wait)
+                attempt += 1
+
+
 def async_command(f):
     @functools.wraps(f)
     def wrapper(*args, **kwargs):
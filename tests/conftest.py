@@ -1,9 +1,13 @@
+import json
 import os
 import re
 import shutil
-from collections.abc import Callable
+import threading
+from collections.abc import AsyncIterator, Callable
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
 from types import SimpleNamespace
+from urllib.parse import parse_qs, urlsplit
 
 from pytest import fixture
 from ruamel.yaml import YAML
@@ -11,6 +15,7 @@ from typer.testing import CliRunner
 
 from edge_containers_cli.__main__ import cli
 from edge_containers_cli.logging import log
+from edge_containers_cli.shell import SpooledOutput
 
 TMPDIR = Path("/tmp/ec_tests")
 DATA_PATH = Path(__file__).parent / "data"
@@ -67,6 +72,7 @@ class MockRun:
         error_OK=False,
         show=False,
         skip_on_dryrun=False,
+        timeout=None,
     ) -> str:
         """
         A function to replace shell.run_command that verifies the command
@@ -78,6 +84,34 @@ class MockRun:
 
         return rsp
 
+    async def run_command_spooled(
+        self,
+        command: str,
+        error_OK=False,
+        timeout=None,
+    ) -> SpooledOutput:
+        """
+        A function to replace shell.run_command_spooled that verifies the
+        command and returns the test response as spooled output.
+        """
+        rsp = self._str_command(command, error_OK)
+        assert isinstance(rsp, str), "non-interactive commands must return str"
+
+        output = SpooledOutput()
+        output.write(rsp.encode())
+        return output
+
+    async def run_command_lines(self, command: str) -> AsyncIterator[str]:
+        """
+        A function to replace shell.run_command_lines that verifies the
+        command and yields the lines of the test response.
+        """
+        rsp = self._str_command(command, False)
+        assert isinstance(rsp, str), "non-interactive commands must return str"
+
+        for line in rsp.splitlines(keepends=True):
+            yield line
+
     async def run_interactive(
         self,
         command: str,
@@ -158,6 +192,57 @@ class MockRun:
 MOCKRUN = MockRun()
 
 
+class FakeApiHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, so connection reuse is visible
+    server: "FakeApiServer"
+
+    def _respond(self):
+        url = urlsplit(self.path)
+        length = int(self.headers.get("Content-Length") or 0)
+        self.server.requests.append(
+            SimpleNamespace(
+                method=self.command,
+                path=url.path,
+                query={key: value[0] for key, value in parse_qs(url.query).items()},
+                headers=dict(self.headers),
+                body=self.rfile.read(length).decode(),
+                client=self.client_address,
+            )
+        )
+        status, body = self.server.routes.get(
+            (self.command, url.path),
+            (404, {"kind": "Status", "reason": "NotFound", "message": "not found"}),
+        )
+        payload = body.encode() if isinstance(body, str) else json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    do_GET = do_PATCH = do_DELETE = do_POST = do_PUT = _respond  # noqa: N815
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeApiServer(ThreadingHTTPServer):
+    """
+    A stand-in for an HTTP API server. Requests are answered from routes,
+    keyed by method and path, and recorded for inspection.
+    """
+
+    daemon_threads = True
+
+    def __init__(self) -> None:
+        super().__init__(("127.0.0.1", 0), FakeApiHandler)
+        self.routes: dict[tuple[str, str], tuple[int, dict | str]] = {}
+        self.requests: list[SimpleNamespace] = []
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
 def mktempdir() -> Path:
     TMPDIR.mkdir(parents=True, exist_ok=True)
     return TMPDIR
@@ -175,12 +260,30 @@ def mock_run(mocker):
     mocker.patch("typer.confirm", return_value=True)
     mocker.patch("tempfile.mkdtemp", mktempdir)
     mocker.patch("edge_containers_cli.shell.shell.run_command", MOCKRUN.run_command)
+    mocker.patch(
+        "edge_containers_cli.shell.shell.run_command_spooled",
+        MOCKRUN.run_command_spooled,
+    )
+    mocker.patch(
+        "edge_containers_cli.shell.shell.run_command_lines",
+        MOCKRUN.run_command_lines,
+    )
     mocker.patch(
         "edge_containers_cli.shell.shell.run_interactive", MOCKRUN.run_interactive
     )
     return MOCKRUN
 
 
+@fixture
+def api_server():
+    server = FakeApiServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
 @fixture
 def data() -> Path:
     return DATA_PATH
@@ -1,6 +1,9 @@
 import shutil
 from pathlib import Path
 
+from edge_containers_cli.cmds.argo_commands import ArgoCommands, find_workload
+from edge_containers_cli.definitions import ECContext
+from edge_containers_cli.utils import _loop_thread, _run_async
 from tests.conftest import TMPDIR
 
 
@@ -57,6 +60,11 @@ def test_start(mock_run, ARGOCD):
     mock_run.run_cli("start bl01t-ea-test-01")
 
 
+def test_start_wait(mock_run, ARGOCD):
+    mock_run.set_seq(ARGOCD.checks + ARGOCD.start + ARGOCD.wait)
+    mock_run.run_cli("start bl01t-ea-test-01 --wait --wait-timeout 60")
+
+
 def test_stop_commit(mock_run, ARGOCD, data: Path):
     mock_run.set_seq(ARGOCD.checks + ARGOCD.stop_commit)
     TMPDIR.mkdir()
@@ -69,7 +77,54 @@ def test_stop(mock_run, ARGOCD):
     mock_run.run_cli("stop bl01t-ea-test-01")
 
 
+def test_stop_many(mock_run, ARGOCD):
+    mock_run.set_seq(ARGOCD.checks[:1] + ARGOCD.stop_many)
+    mock_run.run_cli("stop bl01t-ea-test-01 bl01t-ea-test-02")
+
+
 def test_ps(mock_run, ARGOCD):
+    expect = (
+        "╭──────────────────┬───────┬─────────┬───────┬──────────────────────╮\n"
+        "│ name             │ label │ version │ ready │ deployed             │\n"
+        "├──────────────────┼───────┼─────────┼───────┼──────────────────────┤\n"
+        "│ bl01t-ea-test-01 │ motor │ main    │ True  │ 2024-07-12T13:42:50Z │\n"
+        "╰──────────────────┴───────┴─────────┴───────┴──────────────────────╯\n"
+    )
+    # Everything shown is read from the app list, no manifests are fetched
+    mock_run.set_seq(ARGOCD.checks)
+    res = mock_run.run_cli("ps")
+
+    assert res == expect
+
+
+def test_ps_many(mock_run, ARGOCD):
+    # The apps of services share the root app's namespace but are not targets
+    mock_run.set_seq(ARGOCD.ps_many + ARGOCD.checks)
+    res = mock_run.run_cli("ps -T namespace/*")
+
+    assert "│ namespace/bl01t │ bl01t-ea-test-… │ motor │ main    │ True " in res
+    assert res.count("│ namespace/") == 1
+
+
+def test_ps_many_validates_without_blocking_loop(mock_run, ARGOCD, monkeypatch):
+    # Validation awaits on the shared loop itself. Reached from a coroutine it
+    # would fall back to a private loop, blocking the shared loop meanwhile
+    # and stalling the other targets' queries
+    validate = ArgoCommands._validate_target
+    on_loop = []
+
+    async def validate_target(self):
+        on_loop.append(_loop_thread.in_loop_thread())
+        await validate(self)
+
+    monkeypatch.setattr(ArgoCommands, "_validate_target", validate_target)
+    mock_run.set_seq(ARGOCD.ps_many + ARGOCD.checks)
+    mock_run.run_cli("ps -T namespace/*")
+
+    assert on_loop == [True]
+
+
+def test_ps_manifest_fallback(mock_run, ARGOCD):
     expect = (
         "╭──────────────────┬─────────┬─────────┬───────┬──────────────────────╮\n"
         "│ name             │ label   │ version │ ready │ deployed             │\n"
@@ -77,7 +132,79 @@ def test_ps(mock_run, ARGOCD):
         "│ bl01t-ea-test-01 │ service │ main    │ True  │ 2024-07-12T13:52:35Z │\n"
         "╰──────────────────┴─────────┴─────────┴───────┴──────────────────────╯\n"
     )
-    mock_run.set_seq(ARGOCD.checks + ARGOCD.manifest_check)
+    # Without resource health the live manifests are read instead
+    mock_run.set_seq(
+        ARGOCD.checks[:1] + ARGOCD.apps_without_health + ARGOCD.manifest_check
+    )
     res = mock_run.run_cli("ps")
 
     assert res == expect
+
+
+def test_ps_label_from_manifest(mock_run, ARGOCD):
+    # An app without a description label leaves the workload's label to show
+    mock_run.set_seq(ARGOCD.checks[:1] + ARGOCD.apps_without_label)
+    res = mock_run.run_cli("ps")
+
+    assert (
+        "│ bl01t-ea-test-01 │ motor │ main    │ True  │ 2024-07-12T13:52:35Z │" in res
+    )
+
+
+def test_replies_memoised_per_command(mock_run, ARGOCD):
+    commands = ArgoCommands(ECContext(target="namespace/bl01t"))
+    # the app list and manifests are fetched once for both checks
+    mock_run.set_seq(ARGOCD.checks + ARGOCD.restart[:1])
+    mock_run.call(_run_async, commands._check_stoppable("bl01t-ea-test-01"))
+    mock_run.call(_run_async, commands._check_description("bl01t-ea-test-01"))
+    assert not mock_run.cmd_rsp
+
+    # a new command lists the apps again
+    mock_run.set_seq(ARGOCD.checks[1:])
+    commands._begin_command()
+    mock_run.call(_run_async, commands._check_service("bl01t-ea-test-01"))
+    assert not mock_run.cmd_rsp
+
+
+def test_unchanged_apps_not_refetched(mock_run, ARGOCD):
+    commands = ArgoCommands(ECContext(target="namespace/bl01t"))
+    # the second poll finds the app at the same version, so reads no manifests
+    mock_run.set_seq(
+        ARGOCD.checks[:1]
+        + ARGOCD.apps_without_health
+        + ARGOCD.manifest_check
+        + ARGOCD.apps_without_health
+    )
+    first = mock_run.call(commands._get_services_df, False)
+    second = mock_run.call(commands._get_services_df, False)
+
+    assert not mock_run.cmd_rsp
+    assert first.equals(second)
+
+
+def test_each_run_validates(mock_run, ARGOCD):
+    # every run asks argocd, so an expired login is always caught up front
+    mock_run.set_seq(ARGOCD.checks[:1] + ARGOCD.checks[:1])
+    for _ in range(2):
+        commands = ArgoCommands(ECContext(target="namespace/bl01t"))
+        assert mock_run.call(getattr, commands, "target") == "namespace/bl01t"
+    assert not mock_run.cmd_rsp
+
+
+def test_find_workload_skips_and_stops_early():
+    async def lines():
+        # a config map is passed over without parsing its invalid payload
+        yield "---\n"
+        yield "apiVersion: v1\n"
+        yield "kind: ConfigMap\n"
+        yield "data: {unclosed\n"
+        yield "---\n"
+        yield "kind: StatefulSet\n"
+        yield "metadata:\n"
+        yield "  name: bl01t-ea-test-01\n"
+        yield "---\n"
+        raise AssertionError("read past the match")
+
+    manifest = _run_async(find_workload(lines(), "bl01t-ea-test-01"))
+
+    assert manifest == {"kind": "StatefulSet", "metadata": {"name": "bl01t-ea-test-01"}}
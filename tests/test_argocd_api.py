@@ -0,0 +1,219 @@
+import json
+
+from pytest import fixture
+from typer.testing import CliRunner
+
+from edge_containers_cli.__main__ import cli
+
+SERVICE = "bl01t-ea-test-01"
+APPS = "/api/v1/applications"
+
+
+@fixture
+def argocd_api(api_server, ARGOCD, tmp_path, monkeypatch):
+    server = api_server.url.removeprefix("http://")
+    config = tmp_path / ".config" / "argocd" / "config"
+    config.parent.mkdir(parents=True)
+    config.write_text(
+        f"""
+contexts:
+  - name: test
+    server: {server}
+    user: test
+current-context: test
+servers:
+  - server: {server}
+    plain-text: true
+users:
+  - name: test
+    auth-token: secret-token
+"""
+    )
+    monkeypatch.setenv("HOME", str(tmp_path))
+    monkeypatch.setenv("EC_TRANSPORT", "API")
+
+    app = {
+        "metadata": {
+            "name": SERVICE,
+            "namespace": "namespace",
+            "creationTimestamp": "2024-07-12T13:42:50Z",
+            "labels": {"description": "motor"},
+        },
+        "spec": {"source": {"targetRevision": "main"}},
+        "status": {
+            "resources": [
+                {
+                    "kind": "StatefulSet",
+                    "name": SERVICE,
+                    "health": {"status": "Healthy"},
+                }
+            ],
+            "summary": {"images": ["ioc:1.0"]},
+        },
+    }
+    manifest = {
+        "kind": "StatefulSet",
+        "metadata": {"name": SERVICE, "labels": {"enabled": "true"}},
+    }
+    root = {
+        "spec": {
+            "source": {
+                "helm": {
+                    "parameters": [
+                        {"name": f"services.{SERVICE}.enabled", "value": "true"},
+                        {"name": "services.other.enabled", "value": "false"},
+                    ]
+                }
+            }
+        }
+    }
+    api_server.routes = {
+        ("GET", f"{APPS}/bl01t"): (200, root),
+        ("GET", APPS): (200, {"items": [app]}),
+        ("GET", f"{APPS}/{SERVICE}/managed-resources"): (
+            200,
+            {
+                "items": [
+                    {"kind": "ConfigMap", "name": SERVICE, "liveState": "{"},
+                    {
+                        "kind": "StatefulSet",
+                        "name": SERVICE,
+                        "liveState": json.dumps(manifest),
+                    },
+                ]
+            },
+        ),
+        ("PUT", f"{APPS}/bl01t/spec"): (200, {}),
+    }
+    return api_server
+
+
+def run(*args: str) -> str:
+    result = CliRunner().invoke(cli, list(args))
+    if result.exception:
+        raise result.exception
+    return result.stdout
+
+
+def test_ps(argocd_api):
+    output = run("ps")
+
+    assert f"{SERVICE} │ motor │ main    │ True" in output
+    assert argocd_api.requests[-1].query == {"appNamespace": "namespace"}
+    assert all(
+        r.headers["Authorization"] == "Bearer secret-token" for r in argocd_api.requests
+    )
+    # Calls share pooled connections rather than opening one each
+    assert len({r.client for r in argocd_api.requests}) < len(argocd_api.requests)
+
+
+def test_stop(argocd_api):
+    run("stop", SERVICE)
+
+    put = argocd_api.requests[-1]
+    assert put.method == "PUT"
+    assert json.loads(put.body)["source"]["helm"]["parameters"] == [
+        {"name": "services.other.enabled", "value": "false"},
+        {"name": f"services.{SERVICE}.enabled", "value": "False"},
+    ]
+
+
+def test_logs(argocd_api):
+    def entry(result: dict) -> str:
+        return json.dumps({"result": result}) + "\n"
+
+    argocd_api.routes[("GET", f"{APPS}/{SERVICE}/logs")] = (
+        200,
+        entry({"content": "ioc started", "podName": f"{SERVICE}-0"})
+        + entry({"content": "", "last": True}),
+    )
+    assert run("logs", SERVICE, "--previous") == "ioc started\n"
+    assert argocd_api.requests[-1].query == {
+        "appNamespace": "namespace",
+        "follow": "false",
+        "previous": "true",
+    }
+
+
+def test_restart(argocd_api):
+    resource = {
+        "group": "apps",
+        "version": "v1",
+        "kind": "StatefulSet",
+        "namespace": "bl01t",
+        "name": SERVICE,
+    }
+    argocd_api.routes[("GET", f"{APPS}/{SERVICE}")] = (
+        200,
+        {"status": {"resources": [resource, {"kind": "ConfigMap", "name": "x"}]}},
+    )
+    argocd_api.routes[("DELETE", f"{APPS}/{SERVICE}/resource")] = (200, {})
+    run("restart", SERVICE)
+
+    delete = argocd_api.requests[-1]
+    assert delete.method == "DELETE"
+    assert delete.query == {
+        "appNamespace": "namespace",
+        "namespace": "bl01t",
+        "resourceName": SERVICE,
+        "group": "apps",
+        "version": "v1",
+        "kind": "StatefulSet",
+    }
+
+
+def test_not_authenticated(argocd_api, monkeypatch):
+    monkeypatch.delenv("EC_LOGIN", raising=False)
+    argocd_api.routes[("GET", f"{APPS}/bl01t")] = (
+        401,
+        {"code": 16, "message": "invalid session"},
+    )
+    result = CliRunner().invoke(cli, ["ps"])
+
+    assert "Not authenticated to argocd server" in str(result.exception)
+
+
+def test_stop_wait(argocd_api):
+    def event(sync: str, reconciled: str) -> str:
+        status = {
+            "sync": {"status": sync},
+            "health": {"status": "Healthy"},
+            "reconciledAt": reconciled,
+        }
+        return json.dumps({"result": {"application": {"status": status}}})
+
+    # Each app is refreshed, then watched until it reports the change applied
+    reconciled = {"reconciledAt": "2024-07-12T13:43:00Z"}
+    argocd_api.routes[("GET", f"{APPS}/bl01t")][1]["status"] = reconciled
+    argocd_api.routes[("GET", f"{APPS}/{SERVICE}")] = (200, {"status": reconciled})
+    argocd_api.routes[("GET", "/api/v1/stream/applications")] = (
+        200,
+        event("OutOfSync", "2024-07-12T13:43:00Z")
+        + "\n"
+        + event("Synced", "2024-07-12T13:43:05Z")
+        + "\n",
+    )
+    run("stop", SERVICE, "--wait")
+
+    refreshes = [r.path for r in argocd_api.requests if "refresh" in r.query]
+    assert refreshes == [f"{APPS}/bl01t", f"{APPS}/{SERVICE}"]
+    watches = [r.query for r in argocd_api.requests if "/stream/" in r.path]
+    assert watches == [
+        {"name": "bl01t", "appNamespace": "namespace"},
+        {"name": SERVICE, "appNamespace": "namespace"},
+    ]
+
+
+def test_stop_wait_ignores_stale_status(argocd_api):
+    # A settled status from before the refresh does not describe the change
+    reconciled = {"reconciledAt": "2024-07-12T13:43:00Z"}
+    argocd_api.routes[("GET", f"{APPS}/bl01t")][1]["status"] = reconciled
+    status = {"sync": {"status": "Synced"}, "reconciledAt": "2024-07-12T13:42:00Z"}
+    argocd_api.routes[("GET", "/api/v1/stream/applications")] = (
+        200,
+        json.dumps({"result": {"application": {"status": status}}}) + "\n",
+    )
+
+    result = CliRunner().invoke(cli, ["stop", SERVICE, "--wait"])
+
+    assert "timed out waiting for namespace/bl01t" in str(result.exception)
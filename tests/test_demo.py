@@ -18,6 +18,14 @@ def test_stop(mock_run, DEMO):
     mock_run.run_cli("stop demo-ea-01")
 
 
+def test_start_has_no_wait(mock_run, DEMO):
+    # Demo changes apply at once, so there is nothing to wait for
+    res = mock_run.run_cli("start --help")
+
+    assert "--commit" in res
+    assert "--wait" not in res
+
+
 def test_ps(mock_run, DEMO):
     expect = (
         "╭────────────┬────────────────┬─────────┬───────┬──────────────────────╮\n"
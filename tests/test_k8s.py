@@ -1,16 +1,31 @@
+import asyncio
+import json
 import shutil
 from pathlib import Path
 
+import polars
+import pytest
+from ruamel.yaml import YAML
+from typer.testing import CliRunner
+
+from edge_containers_cli.__main__ import cli
+from edge_containers_cli.cmds.commands import CommandError
+from edge_containers_cli.cmds.k8s_commands import K8sCommands
+from edge_containers_cli.cmds.k8s_informer import StatefulSetInformer, WatchExpiredError
+from edge_containers_cli.cmds.k8s_services import read_sts_table, sts_frame
+from edge_containers_cli.definitions import ECContext
+from edge_containers_cli.shell import shell
+from edge_containers_cli.utils import _run_async
 from tests.conftest import TMPDIR
 
 
 def test_attach(mock_run, K8S):
-    mock_run.set_seq(K8S.checks + K8S.attach)
+    mock_run.set_seq(K8S.check_service + K8S.attach)
     mock_run.run_cli("attach bl01t-ea-test-01")
 
 
 def test_delete(mock_run, K8S):
-    mock_run.set_seq(K8S.checks + K8S.delete)
+    mock_run.set_seq(K8S.check_service + K8S.delete)
     mock_run.run_cli("delete bl01t-ea-test-01")
 
 
@@ -34,35 +49,88 @@ def test_deploy(mock_run, K8S, data: Path):
 
 
 def test_exec(mock_run, K8S):
-    mock_run.set_seq(K8S.checks + K8S.exec)
+    mock_run.set_seq(K8S.check_service + K8S.exec)
     mock_run.run_cli("exec bl01t-ea-test-01")
 
 
 def test_logs(mock_run, K8S):
-    mock_run.set_seq(K8S.checks + K8S.logs)
+    mock_run.set_seq(K8S.check_service + K8S.logs)
     mock_run.run_cli("logs bl01t-ea-test-01")
 
 
 def test_log_history(mock_run, K8S):
-    mock_run.set_seq(K8S.checks + K8S.log_history)
+    mock_run.set_seq(K8S.check_service + K8S.log_history)
     mock_run.run_cli("log-history bl01t-ea-test-01")
 
 
 def test_restart(mock_run, K8S):
-    mock_run.set_seq(K8S.checks + K8S.restart)
+    mock_run.set_seq(K8S.checks[:1] + K8S.restart)
     mock_run.run_cli("restart bl01t-ea-test-01")
 
 
+def test_restart_many(mock_run, K8S):
+    mock_run.set_seq(K8S.checks[:1] + K8S.restart_many)
+    mock_run.run_cli("restart bl01t-ea-test-01 bl01t-ea-test-02")
+
+
+def test_restart_not_found(mock_run, K8S):
+    mock_run.set_seq(K8S.checks[:1] + K8S.restart_many[:1])
+    mock_run.cmd_rsp[-1] = {**K8S.restart_many[0], "rsp": K8S.restart[0]["rsp"]}
+    with pytest.raises(
+        CommandError, match="No running pods found for bl01t-ea-test-02"
+    ):
+        mock_run.run_cli("restart bl01t-ea-test-01 bl01t-ea-test-02")
+
+
 def test_start(mock_run, K8S):
-    mock_run.set_seq(K8S.checks + K8S.start)
+    mock_run.set_seq(K8S.check_service + K8S.start)
     mock_run.run_cli("start bl01t-ea-test-01")
 
 
 def test_stop(mock_run, K8S):
-    mock_run.set_seq(K8S.checks + K8S.stop)
+    mock_run.set_seq(K8S.check_service + K8S.stop)
     mock_run.run_cli("stop bl01t-ea-test-01")
 
 
+def test_service_not_found(mock_run, K8S):
+    # kubectl reports no match on stderr, which the shell returns with stdout
+    not_found = "No resources found in bl01t namespace.\n"
+    mock_run.set_seq(
+        K8S.check_service[:1] + [{**K8S.check_service[1], "rsp": not_found}]
+    )
+    with pytest.raises(CommandError, match="Service 'bl01t-ea-test-01' not found"):
+        mock_run.run_cli("stop bl01t-ea-test-01")
+
+
+def test_stop_selector(mock_run, K8S):
+    # The selector is matched against the services listed by ps
+    ps_list = K8S.checks[1:2]
+    ps_list[0]["rsp"] = (
+        "bl01t-ea-test-01\t\t2024-07-26T08:16:07Z\t1\n"
+        "bl01t-ea-test-02\t\t2024-07-26T08:16:07Z\t1\n"
+        "bl01t-mo-ioc-01\t\t2024-07-26T08:16:07Z\t1\n"
+    )
+    mock_run.set_seq(K8S.checks[:1] + ps_list + K8S.checks[2:] + K8S.stop_many[1:])
+    mock_run.run_cli("stop --selector bl01t-ea-*")
+
+
+def test_stop_not_found(mock_run, K8S):
+    mock_run.set_seq(K8S.stop_many[:2])
+    with pytest.raises(CommandError, match="not found in bl01t: bl01t-ea-test-03"):
+        mock_run.run_cli("stop bl01t-ea-test-01 bl01t-ea-test-03")
+
+
+def test_ps_many(mock_run, K8S, monkeypatch):
+    # One target at a time so that the commands are run in a known order
+    monkeypatch.setattr("edge_containers_cli.globals.PS_CONCURRENCY", 1)
+    mock_run.set_seq(K8S.ps_many)
+    res = mock_run.run_cli("ps -T bl0*")
+
+    assert "│ target │ name" in res
+    assert "│ bl01t  │ bl01t-ea-test-… │ service │ 2024.7.824f-b │ True " in res
+    assert "│ bl02t  │ bl02t-ea-test-… │ service │ 2024.7.1      │ False" in res
+
+
 def test_ps(mock_run, K8S):
     expect = (
         "╭──────────────────┬─────────┬───────────────┬───────┬──────────────────────╮\n"
@@ -75,3 +143,152 @@ def test_ps(mock_run, K8S):
     res = mock_run.run_cli("ps")
 
     assert res == expect
+
+
+def test_ps_replay(K8S, tmp_path):
+    # Test data shares the cassette format so can be replayed through the shell
+    cassette = tmp_path / "cassette.yaml"
+    # Test commands escape braces for str.format, cassette commands do not
+    YAML().dump(
+        [{**item, "cmd": item["cmd"].format()} for item in K8S.checks], cassette
+    )
+    result = CliRunner().invoke(cli, ["--replay", str(cassette), "ps"])
+
+    assert result.exception is None
+    assert "bl01t-ea-test-01 │ service │ 2024.7.824f-b" in result.stdout
+
+
+def test_services_projection_missing_fields():
+    # jsonpath leaves absent fields empty, e.g. a service that was never ready
+    commands = K8sCommands(ECContext(target="bl01t"))
+    commands.sts_df = read_sts_table(
+        "bl01t-ea-test-01\tmotor\t2024-07-26T08:16:07Z\t1\n"
+        "bl01t-ea-test-02\t\t2024-07-27T09:00:00Z\t\n"
+    )
+    helm_df = polars.DataFrame({"name": ["bl01t-ea-test-01"], "version": ["1.0"]})
+    _run_async(commands._extract_services_df(helm_df))
+
+    assert commands.services_df.sort("name").rows() == [
+        ("bl01t-ea-test-01", "motor", "1.0", True, "2024-07-26T08:16:07Z"),
+        ("bl01t-ea-test-02", "service", None, False, "2024-07-27T09:00:00Z"),
+    ]
+
+
+def test_new_logs_fetches_delta(mock_run, K8S):
+    mock_run.set_seq(K8S.new_logs)
+    commands = K8sCommands(ECContext(target="bl01t"))
+
+    text, cursor = mock_run.call(
+        _run_async, commands._get_new_logs("bl01t-ea-test-01", None, tail=100)
+    )
+    assert text == "iocInit\nstarted\n"
+    # The line repeated from the same second as the cursor is dropped
+    text, cursor = mock_run.call(
+        _run_async, commands._get_new_logs("bl01t-ea-test-01", cursor, tail=100)
+    )
+    assert (text, cursor) == ("running\n", "2024-07-26T08:16:08.2Z")
+
+
+def _sts_event(event_type, name, version, ready=1):
+    return {
+        "type": event_type,
+        "object": {
+            "metadata": {
+                "name": name,
+                "resourceVersion": version,
+                "creationTimestamp": "2024-07-26T08:16:07Z",
+                "labels": {"description": "motor"},
+            },
+            "status": {"readyReplicas": ready},
+        },
+    }
+
+
+def test_informer_applies_watch_events(monkeypatch):
+    async def versions():
+        return polars.DataFrame({"name": ["bl01t-ea-test-01"], "version": ["1.0"]})
+
+    events = [
+        _sts_event("ADDED", "bl01t-ea-test-01", "11"),
+        _sts_event("ADDED", "bl01t-ea-test-02", "12"),
+        _sts_event("MODIFIED", "bl01t-ea-test-01", "13", ready=0),
+        _sts_event("DELETED", "bl01t-ea-test-02", "14"),
+        {"type": "BOOKMARK", "object": {"metadata": {"resourceVersion": "15"}}},
+        {"type": "ERROR", "object": {"kind": "Status", "code": 410}},
+    ]
+
+    async def run_command_lines(command):
+        assert "resourceVersion=10" in command
+        for event in events:
+            yield json.dumps(event) + "\n"
+
+    monkeypatch.setattr(shell, "run_command_lines", run_command_lines)
+    informer = StatefulSetInformer("bl01t", versions)
+    informer.resource_version = "10"
+
+    with pytest.raises(WatchExpiredError):
+        asyncio.run(informer.watch())
+    asyncio.run(informer.refresh_versions())
+
+    assert informer.resource_version == "15"
+    assert informer.services_df().rows() == [
+        ("bl01t-ea-test-01", "motor", "1.0", False, "2024-07-26T08:16:07Z")
+    ]
+
+
+def test_informer_relists_after_bad_watch_line(monkeypatch):
+    listings = []
+
+    async def run_command(command):
+        listings.append(command)
+        if len(listings) > 1:
+            # Relisted after the bad line, end the loop here
+            raise asyncio.CancelledError
+        return json.dumps({"metadata": {"resourceVersion": "10"}, "items": []})
+
+    async def run_command_lines(command):
+        yield '{"type": "ADDED", "obj\n'
+
+    monkeypatch.setattr(shell, "run_command", run_command)
+    monkeypatch.setattr(shell, "run_command_lines", run_command_lines)
+    monkeypatch.setattr("edge_containers_cli.globals.INFORMER_RETRY", 0.01)
+    informer = StatefulSetInformer("bl01t", None)  # type: ignore
+
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(informer._list_and_watch())
+    assert len(listings) == 2
+
+
+def test_informer_unsynced_when_stopped_by_error():
+    async def versions():
+        raise KeyError("name")
+
+    informer = StatefulSetInformer("bl01t", versions)
+    informer._synced.set()
+    informer._versions_stale.set()
+    informer._list_and_watch = asyncio.Event().wait  # type: ignore
+
+    with pytest.raises(ExceptionGroup):
+        asyncio.run(informer.run())
+    assert not informer.synced
+
+
+def test_sts_frame_matches_table():
+    # Statefulset objects and the kubectl jsonpath table give the same columns
+    items = [
+        _sts_event("ADDED", "bl01t-ea-test-01", "1")["object"],
+        {
+            "metadata": {
+                "name": "bl01t-ea-test-02",
+                "creationTimestamp": "2024-07-27T09:00:00Z",
+            },
+            "spec": {"replicas": 0},
+            "status": {},
+        },
+    ]
+    table = (
+        "bl01t-ea-test-01\tmotor\t2024-07-26T08:16:07Z\t1\n"
+        "bl01t-ea-test-02\t\t2024-07-27T09:00:00Z\t\n"
+    )
+
+    assert sts_frame(items).equals(read_sts_table(table))
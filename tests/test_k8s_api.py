@@ -0,0 +1,183 @@
+import base64
+import gzip
+import json
+
+from pytest import fixture
+from typer.testing import CliRunner
+
+from edge_containers_cli.__main__ import cli
+from edge_containers_cli.cmds.k8s_api import K8sApiClient
+from edge_containers_cli.cmds.k8s_commands import K8sCommands
+from edge_containers_cli.definitions import ECContext, ECTransports
+from edge_containers_cli.utils import _run_async
+
+SERVICE = "bl01t-ea-test-01"
+
+
+def helm_secret(name: str, app_version: str) -> dict:
+    release = {"name": name, "chart": {"metadata": {"appVersion": app_version}}}
+    helm_data = base64.b64encode(gzip.compress(json.dumps(release).encode()))
+    return {"data": {"release": base64.b64encode(helm_data).decode()}}
+
+
+@fixture
+def k8s_api(api_server, K8S, tmp_path, monkeypatch):
+    kubeconfig = tmp_path / "config"
+    kubeconfig.write_text(
+        f"""
+apiVersion: v1
+kind: Config
+current-context: test
+contexts:
+  - name: test
+    context: {{cluster: test, user: test}}
+clusters:
+  - name: test
+    cluster: {{server: "{api_server.url}"}}
+users:
+  - name: test
+    user: {{token: secret-token}}
+"""
+    )
+    monkeypatch.setenv("KUBECONFIG", str(kubeconfig))
+    monkeypatch.setenv("EC_TRANSPORT", "API")
+
+    api_server.routes = {
+        ("GET", "/api/v1/namespaces/bl01t"): (200, {"kind": "Namespace"}),
+        ("GET", "/apis/apps/v1/namespaces/bl01t/statefulsets"): (
+            200,
+            {
+                "items": [
+                    {
+                        "metadata": {
+                            "name": SERVICE,
+                            "creationTimestamp": "2024-07-26T08:16:07Z",
+                        },
+                        "status": {"readyReplicas": 1},
+                    }
+                ]
+            },
+        ),
+        ("GET", "/api/v1/namespaces/bl01t/secrets"): (
+            200,
+            {"items": [helm_secret(SERVICE, "2024.7.824f-b")]},
+        ),
+        ("PATCH", f"/apis/apps/v1/namespaces/bl01t/statefulsets/{SERVICE}/scale"): (
+            200,
+            {},
+        ),
+        ("DELETE", "/api/v1/namespaces/bl01t/pods"): (
+            200,
+            {"items": [{"metadata": {"name": f"{SERVICE}-0"}}]},
+        ),
+        ("GET", "/api/v1/namespaces/bl01t/pods"): (
+            200,
+            {"items": [{"metadata": {"name": f"{SERVICE}-0"}}]},
+        ),
+        ("GET", f"/api/v1/namespaces/bl01t/pods/{SERVICE}-0/log"): (
+            200,
+            "ioc started\n",
+        ),
+    }
+    return api_server
+
+
+def run(*args: str) -> str:
+    result = CliRunner().invoke(cli, list(args))
+    if result.exception:
+        raise result.exception
+    return result.stdout
+
+
+def test_ps(k8s_api):
+    output = run("ps")
+
+    assert f"{SERVICE} │ service │ 2024.7.824f-b │ True" in output
+    secrets = [r for r in k8s_api.requests if r.path.endswith("/secrets")]
+    assert secrets[0].query == {"labelSelector": "owner=helm,status=deployed"}
+    assert all(
+        r.headers["Authorization"] == "Bearer secret-token" for r in k8s_api.requests
+    )
+    # Calls share pooled connections rather than opening one each
+    assert len({r.client for r in k8s_api.requests}) < len(k8s_api.requests)
+
+
+def test_stop(k8s_api):
+    run("stop", SERVICE)
+
+    # The service is looked up by name rather than listing the namespace
+    check = k8s_api.requests[-2]
+    assert check.query["fieldSelector"] == f"metadata.name={SERVICE}"
+    assert not any(r.path.endswith("/secrets") for r in k8s_api.requests)
+    patch = k8s_api.requests[-1]
+    assert patch.method == "PATCH"
+    assert patch.headers["Content-Type"] == "application/merge-patch+json"
+    assert json.loads(patch.body) == {"spec": {"replicas": 0}}
+
+
+def test_restart(k8s_api):
+    run("restart", SERVICE)
+
+    delete = k8s_api.requests[-1]
+    assert delete.method == "DELETE"
+    assert delete.query == {"labelSelector": f"app in ({SERVICE})"}
+    # The deletion doubles as the existence check
+    assert [r.method for r in k8s_api.requests] == ["GET", "DELETE"]
+
+
+def test_logs(k8s_api):
+    assert "ioc started" in run("logs", SERVICE, "--previous")
+    assert k8s_api.requests[-1].query == {"previous": "true"}
+
+
+def test_ps_many_skips_failed_target(k8s_api, tmp_path):
+    targets = tmp_path / "targets"
+    targets.write_text("# beamlines\nbl01t\nbl99t\nbl01t\n")
+    output = run("ps", "-T", f"@{targets}")
+
+    assert f"│ bl01t  │ {SERVICE[:14]}" in output
+    assert "bl99t" not in output
+    # Duplicate targets are queried once
+    namespaces = [r.path for r in k8s_api.requests if "/namespaces/" in r.path]
+    assert namespaces.count("/api/v1/namespaces/bl01t") == 1
+
+
+def test_ps_many_shares_client(k8s_api, monkeypatch):
+    # The kubeconfig is read once and its client serves every target
+    clients = []
+    from_kubeconfig = K8sApiClient.from_kubeconfig
+
+    def counted():
+        clients.append(from_kubeconfig())
+        return clients[-1]
+
+    monkeypatch.setattr(K8sApiClient, "from_kubeconfig", counted)
+    run("ps", "-T", "bl01t", "-T", "bl99t")
+
+    assert len(clients) == 1
+
+
+def test_new_logs(k8s_api):
+    k8s_api.routes[("GET", f"/api/v1/namespaces/bl01t/pods/{SERVICE}-0/log")] = (
+        200,
+        "2024-07-26T08:16:07Z ioc started\n",
+    )
+    commands = K8sCommands(ECContext(target="bl01t", transport=ECTransports.API))
+    since = "2024-07-26T08:16:06Z"
+
+    assert _run_async(commands._get_new_logs(SERVICE, since, tail=10)) == (
+        "ioc started\n",
+        "2024-07-26T08:16:07Z",
+    )
+    assert k8s_api.requests[-1].query == {
+        "tailLines": "10",
+        "sinceTime": since,
+        "timestamps": "true",
+    }
+
+
+def test_namespace_not_found(k8s_api):
+    del k8s_api.routes[("GET", "/api/v1/namespaces/bl01t")]
+    result = CliRunner().invoke(cli, ["ps"])
+
+    assert "Namespace 'bl01t' not found" in str(result.exception)
@@ -1,6 +1,16 @@
+import asyncio
+import json
+import os
+import threading
+import time
+from contextlib import aclosing
+
 import pytest
 
-from edge_containers_cli.utils import YamlFile, YamlFileError
+from edge_containers_cli.cassette import Cassette
+from edge_containers_cli.shell import ECShell, ShellError, ShellTimeoutError
+from edge_containers_cli.tracing import ShellTracer, percentile
+from edge_containers_cli.utils import RetryPolicy, YamlFile, YamlFileError, _run_async
 
 
 def test_yaml_processor_get(data):
@@ -51,3 +61,206 @@ def test_yaml_processor_remove(data):
     processor.remove_key(test_key)
     with pytest.raises(YamlFileError):
         processor.get_key(test_key)
+
+
+def test_shell_timeout_kills_process_group(tmp_path):
+    shell = ECShell()
+    shell.timeout = 0.5
+    marker = tmp_path / "marker"
+    start = time.monotonic()
+    with pytest.raises(ShellTimeoutError):
+        # The backgrounded child would outlive a kill of the shell alone
+        asyncio.run(shell.run_command(f"(sleep 1; touch {marker}) & sleep 5"))
+    assert time.monotonic() - start < 2
+    time.sleep(1.5)
+    assert not marker.exists()
+
+
+def test_shell_timeout_per_call_overrides_default():
+    shell = ECShell()
+    shell.timeout = 0.1
+    assert asyncio.run(shell.run_command("sleep 0.3; echo done", timeout=5)) == "done\n"
+
+
+def test_shell_keeps_session_without_timeout():
+    shell = ECShell()
+    # Without a timeout the command shares our terminal for prompts
+    assert int(asyncio.run(shell.run_command("ps -o sid= -p $$"))) == os.getsid(0)
+    shell.timeout = 5
+    assert int(asyncio.run(shell.run_command("ps -o sid= -p $$"))) != os.getsid(0)
+
+
+def test_shell_tracer(tmp_path):
+    shell = ECShell()
+    shell.tracer = ShellTracer()
+    asyncio.run(shell.run_command("echo hello"))
+    asyncio.run(shell.run_command("false", error_OK=True))
+
+    first, second = shell.tracer.records
+    assert first.executable == "echo"
+    assert first.output_bytes == len("hello\n")
+    assert first.returncode == 0
+    assert second.returncode == 1
+    assert first.caller == "test_shell_tracer"
+
+    trace_file = tmp_path / "trace.json"
+    shell.tracer.dump(str(trace_file))
+    events = json.loads(trace_file.read_text())["traceEvents"]
+    assert [event["name"] for event in events] == ["echo", "false"]
+    assert events[1]["args"]["returncode"] == 1
+
+    summary_file = tmp_path / "summary.txt"
+    shell.tracer.dump(str(summary_file))
+    assert "echo" in summary_file.read_text()
+
+
+def test_percentile():
+    values = [float(value) for value in range(1, 101)]
+    assert percentile(values, 0.5) == 50.0
+    assert percentile(values, 0.95) == 95.0
+    assert percentile([3.0], 0.95) == 3.0
+
+
+def test_shell_record_replay(tmp_path):
+    cassette_file = tmp_path / "cassette.yaml"
+    recorder = ECShell()
+    recorder.cassette = Cassette(cassette_file)
+    asyncio.run(recorder.run_command("sleep 0.2; printf 'one\ntwo\n'"))
+    asyncio.run(recorder.run_command("echo oops >&2; false", error_OK=True))
+    recorder.cassette.save()
+
+    player = ECShell()
+    player.cassette = Cassette(cassette_file, replay=True, latency=1.0)
+    start = time.monotonic()
+    output = asyncio.run(player.run_command("sleep 0.2; printf 'one\ntwo\n'"))
+    assert output == "one\ntwo\n"
+    assert time.monotonic() - start >= 0.2  # recorded latency is simulated
+    with pytest.raises(ShellError, match="oops"):
+        asyncio.run(player.run_command("echo oops >&2; false"))
+    with pytest.raises(ShellError, match="No recorded response"):
+        asyncio.run(player.run_command("echo never recorded"))
+
+    # a recorded response is also served as a stream of lines
+    async def lines(command):
+        return [line async for line in player.run_command_lines(command)]
+
+    assert asyncio.run(lines("sleep 0.2; printf 'one\ntwo\n'")) == ["one\n", "two\n"]
+    with pytest.raises(ShellError, match="oops"):
+        asyncio.run(lines("echo oops >&2; false"))
+
+
+def test_shell_spooled_output(tmp_path):
+    shell = ECShell()
+    shell.spool_threshold = 1024  # far smaller than the output
+    line = "x" * 99 + "\n"
+    with asyncio.run(
+        shell.run_command_spooled(f"yes {line[:-1]} | head -n 1000")
+    ) as output:
+        assert output.size == 1000 * len(line)
+        assert next(output.lines()) == line
+        assert output.text() == line * 1000
+        copy = tmp_path / "copy.txt"
+        with open(copy, "w") as stream:
+            output.copy_to(stream)
+        assert copy.read_text() == line * 1000
+
+
+def test_shell_lines_stops_command(tmp_path):
+    async def first_lines():
+        lines = []
+        command = f"echo one; echo two; sleep 30; touch {tmp_path / 'done'}"
+        async with aclosing(ECShell().run_command_lines(command)) as stream:
+            async for line in stream:
+                lines.append(line)
+                if len(lines) == 2:
+                    break
+        return lines
+
+    start = time.monotonic()
+    assert asyncio.run(first_lines()) == ["one\n", "two\n"]
+    assert time.monotonic() - start < 10
+    assert not (tmp_path / "done").exists()
+
+    with pytest.raises(ShellError):
+        asyncio.run(ECShell().run_command_lines("exit 1").__anext__())
+
+
+def test_run_async_shared_loop():
+    async def loop_thread():
+        await asyncio.sleep(0)
+        return threading.get_ident()
+
+    async def nested():
+        # A coroutine on the shared loop calling back into synchronous code
+        return _run_async(loop_thread())
+
+    async def from_running_loop():
+        return _run_async(loop_thread())
+
+    first = _run_async(loop_thread())
+    assert _run_async(loop_thread()) == first
+    assert first != threading.get_ident()
+    assert asyncio.run(from_running_loop()) == first
+    assert _run_async(nested()) not in (first, threading.get_ident())
+
+
+def test_retry_policy_backs_off_without_blocking(monkeypatch):
+    from edge_containers_cli.cmds.argo_commands import do_retry
+
+    calls = []
+
+    @do_retry
+    async def flaky():
+        calls.append(time.monotonic())
+        if len(calls) < 3:
+            raise ShellError("rpc error: code = Unavailable desc = connection reset")
+        return "done"
+
+    async def main():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.001)
+
+        task = asyncio.create_task(ticker())
+        fast = RetryPolicy(delay=0.02, jitter=0.0, retry_on=(ShellError,))
+        result = await flaky(retry=fast)
+        task.cancel()
+        return result, ticks
+
+    result, ticks = asyncio.run(main())
+
+    assert result == "done"
+    # the second wait is twice the first and other tasks ran meanwhile
+    assert calls[2] - calls[1] > calls[1] - calls[0] >= 0.02
+    assert ticks > 10
+
+
+def test_retry_policy_stops_on_permanent_error_and_budget():
+    from edge_containers_cli.cmds.argo_commands import do_retry
+
+    calls = 0
+
+    @do_retry
+    async def denied():
+        nonlocal calls
+        calls += 1
+        raise ShellError("rpc error: code = PermissionDenied desc = denied")
+
+    with pytest.raises(ShellError):
+        asyncio.run(denied())
+    assert calls == 1
+
+    async def unavailable():
+        nonlocal calls
+        calls += 1
+        raise ShellError("rpc error: code = Unavailable desc = connection reset")
+
+    # the first wait would overrun the budget so no retry is made
+    policy = RetryPolicy(delay=0.05, budget=0.01, retry_on=(ShellError,))
+    with pytest.raises(ShellError):
+        asyncio.run(policy.run(unavailable))
+    assert calls == 2